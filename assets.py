@@ -0,0 +1,279 @@
+"""Manifest-driven asset loading.
+
+Every image and sound listed in assets.json is read and decoded on a thread
+pool the first time any asset is asked for. Files with identical contents
+are decoded once and shared. When config.USE_ASSET_BUNDLE is on and the
+bundle exists, files are read from that single memory-mapped file instead.
+
+    python assets.py pack     Write the bundle from the manifest
+    python assets.py report   Load everything and print per-asset timings
+"""
+import concurrent.futures
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import pygame
+import config
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, "assets.json")
+
+BUNDLE_MAGIC = b"RTCB"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<4sII")  # Magic, version, length of the JSON index
+ASSET_WORKERS = 4
+
+def asset_key(path):
+    """Manifest paths are relative to the project root with forward slashes"""
+    if os.path.isabs(path):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    return path.replace(os.sep, "/")
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+def pack_bundle(manifest, bundle_path=config.ASSET_BUNDLE):
+    """Write every file in the manifest into one bundle, returning its size in bytes"""
+    paths = sorted({asset_key(path) for kind in ("images", "sounds", "music") for path in manifest.get(kind, [])})
+    blobs = []
+    for path in paths:
+        with open(os.path.join(PROJECT_ROOT, path), "rb") as f:
+            blobs.append(f.read())
+
+    # Offsets are relative to the end of the index, so the index can be built first
+    index = {}
+    offset = 0
+    for path, blob in zip(paths, blobs):
+        index[path] = [offset, len(blob)]
+        offset += len(blob)
+    index_bytes = json.dumps(index).encode()
+
+    temp_path = bundle_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp_path, bundle_path)
+    return BUNDLE_HEADER.size + len(index_bytes) + offset
+
+class Bundle:
+    """Read-only view of a packed bundle through mmap"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_size = BUNDLE_HEADER.unpack_from(self.data)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} asset bundle")
+        start = BUNDLE_HEADER.size
+        self.index = json.loads(bytes(self.data[start:start + index_size]))
+        self.base = start + index_size
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def read(self, path):
+        offset, size = self.index[path]
+        return self.data[self.base + offset:self.base + offset + size]
+
+class LoadRecord:
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+        self.read_ms = 0.0
+        self.decode_ms = 0.0
+        self.shared_with = None  # Path whose decoded copy this asset reuses
+        self.error = None
+
+class AssetLoader:
+    def __init__(self, manifest_path=MANIFEST_PATH, bundle_path=None):
+        self.manifest_path = manifest_path
+        self.bundle = Bundle(bundle_path) if bundle_path and os.path.exists(bundle_path) else None
+        self.loaded = False
+        self.images = {}  # Decoded surfaces, not yet converted to the display format
+        self.converted = {}
+        self.sounds = {}
+        self.sound_data = {}  # Sounds read before the mixer was running, decoded on first use
+        self.errors = {}
+        self.records = {}
+        self.total_ms = 0.0
+
+    def read(self, path):
+        if self.bundle is not None and path in self.bundle:
+            return self.bundle.read(path)
+        with open(os.path.join(PROJECT_ROOT, path), "rb") as f:
+            return f.read()
+
+    def fetch(self, path):
+        """Read one file, returning (contents, content hash)"""
+        record = self.records[path]
+        start = time.perf_counter()
+        data = self.read(path)
+        record.read_ms = (time.perf_counter() - start) * 1000
+        record.size = len(data)
+        return data, hashlib.sha1(data).digest()
+
+    def decode(self, kind, path, data):
+        record = self.records[path]
+        start = time.perf_counter()
+        if kind == "images":
+            asset = pygame.image.load(io.BytesIO(data), path)
+        else:
+            asset = pygame.mixer.Sound(file=io.BytesIO(data))
+        record.decode_ms = (time.perf_counter() - start) * 1000
+        return asset
+
+    def load_all(self):
+        """Read and decode every image and sound in the manifest on a thread pool"""
+        self.loaded = True
+        start = time.perf_counter()
+        manifest = load_manifest(self.manifest_path)
+        entries = [(kind, asset_key(path)) for kind in ("images", "sounds") for path in manifest.get(kind, [])]
+        for kind, path in entries:
+            self.records[path] = LoadRecord(path)
+
+        with concurrent.futures.ThreadPoolExecutor(ASSET_WORKERS) as pool:
+            fetched = {}
+            for (kind, path), future in [(entry, pool.submit(self.fetch, entry[1])) for entry in entries]:
+                try:
+                    fetched[path] = future.result()
+                except OSError as e:
+                    self.fail(path, e)
+
+            # Decode each distinct file once, duplicates point at the first path with those bytes
+            first_with = {}
+            decodes = []
+            for kind, path in entries:
+                if path not in fetched:
+                    continue
+                data, digest = fetched[path]
+                if (kind, digest) in first_with:
+                    self.records[path].shared_with = first_with[kind, digest]
+                else:
+                    first_with[kind, digest] = path
+                    if kind == "sounds" and not pygame.mixer.get_init():
+                        # Sounds can only be decoded once the mixer is up, so keep the bytes for later
+                        self.sound_data[path] = data
+                    else:
+                        decodes.append((kind, path, pool.submit(self.decode, kind, path, data)))
+            for kind, path, future in decodes:
+                try:
+                    self.store(kind, path, future.result())
+                except pygame.error as e:
+                    self.fail(path, e)
+
+        for kind, path in entries:
+            shared_with = self.records[path].shared_with
+            if shared_with is not None:
+                self.alias(kind, path, shared_with)
+        self.total_ms = (time.perf_counter() - start) * 1000
+
+    def store(self, kind, path, asset):
+        if kind == "images":
+            self.images[path] = asset
+        else:
+            self.sounds[path] = asset
+
+    def alias(self, kind, path, original):
+        if original in self.errors:
+            self.errors[path] = self.errors[original]
+        elif kind == "images":
+            self.images[path] = self.images[original]
+        elif original in self.sounds:
+            self.sounds[path] = self.sounds[original]
+        # Otherwise the original is still in sound_data, and get() shares it once decoded
+
+    def fail(self, path, error):
+        self.errors[path] = error
+        self.records[path].error = error
+
+    def get(self, kind, path):
+        if not self.loaded:
+            self.load_all()
+        path = asset_key(path)
+        table = self.images if kind == "images" else self.sounds
+        if path in self.errors:
+            raise self.errors[path]
+        if kind == "sounds" and path not in table and path in self.records:
+            original = self.records[path].shared_with or path
+            if original in self.sound_data:
+                self.decode_later(original)
+            if original in self.sounds:
+                table[path] = self.sounds[original]
+        if path not in table:
+            # Not in the manifest, load it on the spot
+            self.records[path] = LoadRecord(path)
+            data, _ = self.fetch(path)
+            self.store(kind, path, self.decode(kind, path, data))
+        return table[path]
+
+    def decode_later(self, path):
+        """Decode a sound load_all kept as bytes because the mixer wasn't running"""
+        if not pygame.mixer.get_init():
+            # Not recorded in errors, the same call works once the mixer is started
+            raise pygame.error("mixer not initialized")
+        try:
+            self.sounds[path] = self.decode("sounds", path, self.sound_data.pop(path))
+        except pygame.error as e:
+            self.fail(path, e)
+            raise
+
+    def image(self, path):
+        """The image at path, converted for the display once one is open"""
+        surface = self.get("images", path)
+        if pygame.display.get_surface() is None:
+            return surface
+        converted = self.converted.get(id(surface))
+        if converted is None:
+            converted = surface.convert_alpha()
+            self.converted[id(surface)] = converted  # Keyed by surface so duplicates share it
+        return converted
+
+    def sound(self, path):
+        return self.get("sounds", path)
+
+    def music(self, path):
+        """A path or file object for pygame.mixer.music.load"""
+        path = asset_key(path)
+        if self.bundle is not None and path in self.bundle:
+            return io.BytesIO(self.bundle.read(path))
+        return os.path.join(PROJECT_ROOT, path)
+
+    def report(self):
+        lines = [f"{'asset':<28}{'KiB':>8}{'read ms':>9}{'decode ms':>11}  note"]
+        for path, record in sorted(self.records.items()):
+            if record.error is not None:
+                note = f"failed: {record.error}"
+            elif record.shared_with is not None:
+                note = f"same as {record.shared_with}"
+            elif path in self.sound_data:
+                note = "decoded on first use"
+            else:
+                note = ""
+            lines.append(f"{path:<28}{record.size / 1024:>8.1f}{record.read_ms:>9.2f}{record.decode_ms:>11.2f}  {note}")
+        source = "bundle" if self.bundle is not None else "files"
+        lines.append(f"{len(self.records)} assets from {source} in {self.total_ms:.1f} ms")
+        return "\n".join(lines)
+
+loader = AssetLoader(bundle_path=config.ASSET_BUNDLE if config.USE_ASSET_BUNDLE else None)
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if command == "pack":
+        size = pack_bundle(load_manifest())
+        print(f"Wrote {config.ASSET_BUNDLE} ({size / 1024:.1f} KiB)")
+    elif command == "report":
+        pygame.mixer.init()
+        loader.load_all()
+        print(loader.report())
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    main()
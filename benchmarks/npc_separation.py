@@ -0,0 +1,77 @@
+"""Compare the NPC separation pass against the old nested loop.
+
+Run from the project root with: python -m benchmarks.npc_separation
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import math
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from pygame.math import Vector2
+import config
+import npc
+
+NPC_COUNTS = [20, 200, 2000, 5000]
+REPEATS = 5
+
+def make_game_state(count):
+    game_state = SimpleNamespace(
+        npcs=[],
+        npc_size=npc.NPC_SIZE,
+        crowd=None,
+        get_pistol=lambda: None
+    )
+    for _ in range(count):
+        x = random.uniform(0, config.LEVEL_WIDTH - npc.NPC_SIZE)
+        y = random.uniform(0, config.LEVEL_HEIGHT - npc.NPC_SIZE)
+        game_state.npcs.append(npc.NPC(x, y, game_state))
+    return game_state
+
+def nested_separation(game_state):
+    # The pre-grid O(n^2) pass, kept here as the reference point
+    for a in game_state.npcs:
+        for other in game_state.npcs:
+            if a != other and a.collision_cooldown == 0 and other.collision_cooldown == 0:
+                distance = a.pos.distance_to(other.pos)
+                if distance < game_state.npc_size:
+                    if distance > 0:
+                        a.direction = (a.pos - other.pos).normalize()
+                    else:
+                        angle = random.uniform(0, 2 * math.pi)
+                        a.direction = Vector2(math.cos(angle), math.sin(angle))
+                    other.direction = -a.direction
+                    separation = (a.direction * (game_state.npc_size - distance + 1)) / 2
+                    a.pos += separation
+                    other.pos -= separation
+                    a.change_state()
+                    other.change_state()
+
+def time_pass(separation_pass, game_state, start_positions):
+    timings = []
+    for _ in range(REPEATS):
+        for n, pos in zip(game_state.npcs, start_positions):
+            n.pos = Vector2(pos)
+        start = time.perf_counter()
+        separation_pass(game_state)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    random.seed(0)
+    print(f"{'NPCs':>6} {'nested ms':>12} {'array ms':>10} {'speedup':>9}")
+    for count in NPC_COUNTS:
+        game_state = make_game_state(count)
+        start_positions = [Vector2(n.pos) for n in game_state.npcs]
+        array_ms = time_pass(npc.separate_npcs, game_state, start_positions)
+        if count <= 2000:
+            nested_ms = time_pass(nested_separation, game_state, start_positions)
+            print(f"{count:>6} {nested_ms:>12.2f} {array_ms:>10.2f} {nested_ms / array_ms:>8.1f}x")
+        else:
+            print(f"{count:>6} {'-':>12} {array_ms:>10.2f} {'-':>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Benchmark suite for simulation, rendering and map generation.
+
+Run from the project root with: python -m benchmarks.suite
+
+Each scenario is timed over a number of samples, and its median and p99
+(in milliseconds) are written to a JSON results file. If a baseline file
+exists, every median is compared against it and the run exits non-zero
+when one regressed by more than the threshold. Use --save-baseline to
+record the current numbers as the new baseline.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import pygame
+import config
+import game
+import graphics
+import lod
+import maps
+import npc
+import weapons
+from projectiles import OWNER_PLAYER, OWNER_NPC
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_RESULTS = os.path.join(config.PROJECT_ROOT, "bench_output.json")
+DEFAULT_THRESHOLD = 0.15  # Fail when a median is more than 15% slower than the baseline
+MIN_REGRESSION_MS = 0.05  # ...and slower by at least this much, below it timings are mostly noise
+WARMUP_SAMPLES = 3
+SEED = 0
+
+class Scenario:
+    """A named benchmark. setup() returns (prepare, run): prepare is called
+    untimed before every sample (or is None), run is the timed part. If
+    run() returns a number, that is used as the sample's time in ms.
+
+    Sub-millisecond scenarios call run() several times per sample, and
+    report the mean of those calls, to keep timer noise out of the numbers.
+    """
+    def __init__(self, name, setup, samples, iterations=1):
+        self.name = name
+        self.setup = setup
+        self.samples = samples
+        self.iterations = iterations
+
+def wfc_generate(width, height):
+    def setup():
+        tile_types = list(maps.TILE_TYPES.keys())
+        seeds = iter(range(10**9))
+
+        def run():
+            wfc = maps.WaveFunctionCollapse(tile_types, maps.WFC_RULES, seed=next(seeds))
+            wfc.generate(width, height)
+        return None, run
+    return setup
+
+def make_game_state():
+    random.seed(SEED)
+    game_state = game.GameState()
+    graphics.update_camera(game_state)
+    return game_state
+
+def update_npcs(count):
+    def setup():
+        game_state = make_game_state()
+        # Spawn straight into the view, past the MAX_NPCS cap
+        for _ in range(count):
+            x = random.uniform(game_state.camera_pos[0], game_state.camera_pos[0] + config.WIDTH)
+            y = random.uniform(game_state.camera_pos[1], game_state.camera_pos[1] + config.HEIGHT)
+            game_state.add_npc(npc.NPC(x, y, game_state))
+
+        def run():
+            npc.update_npcs(game_state)
+        return None, run
+    return setup
+
+def fill_projectiles(game_state, count, rng):
+    """Refill the pool with bullets in view, flying in random directions"""
+    pool = game_state.projectiles
+    pool.clear()
+    for _ in range(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        pool.add(game_state.camera_pos[0] + rng.uniform(0, config.WIDTH),
+                 game_state.camera_pos[1] + rng.uniform(0, config.HEIGHT),
+                 math.cos(angle) * game_state.bullet_speed, math.sin(angle) * game_state.bullet_speed,
+                 1, rng.choice((OWNER_PLAYER, OWNER_NPC)))
+
+def update_npcs_spread(count, ai_lod):
+    def setup():
+        game_state = make_game_state()
+        game_state.ai_lod = lod.LODScheduler() if ai_lod else None
+        # Out to the despawn distance, a screen past the view on every side
+        for _ in range(count):
+            x = random.uniform(game_state.camera_pos[0] - config.WIDTH, game_state.camera_pos[0] + config.WIDTH * 2)
+            y = random.uniform(game_state.camera_pos[1] - config.HEIGHT, game_state.camera_pos[1] + config.HEIGHT * 2)
+            game_state.add_npc(npc.NPC(x, y, game_state))
+
+        def run():
+            game_state.ticks += 1  # AI LOD staggers work by tick
+            npc.update_npcs(game_state)
+        return None, run
+    return setup
+
+def update_bullets(count):
+    def setup():
+        game_state = make_game_state()
+        rng = random.Random(SEED)
+
+        def prepare():
+            # Refill the pool, as bullets leaving the view are culled
+            fill_projectiles(game_state, count, rng)
+
+        def run():
+            weapons.update_bullets(game_state)
+        return prepare, run
+    return setup
+
+def render_frame(npc_count):
+    def setup():
+        game_state = make_game_state()
+        for _ in range(npc_count):
+            game_state.add_npc(npc.NPC(random.uniform(0, config.LEVEL_WIDTH),
+                                       random.uniform(0, config.LEVEL_HEIGHT), game_state))
+        surface = pygame.Surface((config.WIDTH, config.HEIGHT)).convert()
+
+        def run():
+            surface.fill(config.BLACK)
+            maps.render_tilemap(surface, game_state.tilemap, game_state.camera_pos)
+            game_state.minimap.update(game_state)
+            game_state.minimap.draw(surface)
+            graphics.draw_hud(game_state, surface)
+        return None, run
+    return setup
+
+def render_npcs(count):
+    def setup():
+        game_state = make_game_state()
+        # All in view, so every one of them is drawn
+        for _ in range(count):
+            x = random.uniform(game_state.camera_pos[0], game_state.camera_pos[0] + config.WIDTH)
+            y = random.uniform(game_state.camera_pos[1], game_state.camera_pos[1] + config.HEIGHT)
+            game_state.add_npc(npc.NPC(x, y, game_state))
+        surface = pygame.Surface((config.WIDTH, config.HEIGHT)).convert()
+
+        def run():
+            game_state.npc_renderer.draw(surface, game_state.npc_columns(), game_state.camera_pos)
+        return None, run
+    return setup
+
+def render_bullets(count):
+    def setup():
+        game_state = make_game_state()
+        fill_projectiles(game_state, count, random.Random(SEED))
+        surface = pygame.Surface((config.WIDTH, config.HEIGHT)).convert()
+
+        def run():
+            game_state.bullet_renderer.draw(surface, game_state.projectiles, game_state.camera_pos, 0.5)
+        return None, run
+    return setup
+
+def startup(stage):
+    def setup():
+        def run():
+            # A fresh interpreter each time, up to the first menu frame
+            with tempfile.TemporaryDirectory() as directory:
+                profile_path = os.path.join(directory, "startup.json")
+                subprocess.run([sys.executable, os.path.join(config.PROJECT_ROOT, "game.py"),
+                                "--profile-startup", profile_path],
+                               cwd=config.PROJECT_ROOT, stdout=subprocess.DEVNULL, check=True)
+                with open(profile_path) as f:
+                    return json.load(f)[stage]
+        return None, run
+    return setup
+
+SCENARIOS = [
+    Scenario("wfc_generate_32x32", wfc_generate(32, 32), 20),
+    Scenario("wfc_generate_64x64", wfc_generate(64, 64), 10),
+    Scenario("wfc_generate_128x128", wfc_generate(128, 128), 5),
+    Scenario("update_npcs_20", update_npcs(20), 200, 5),
+    Scenario("update_npcs_200", update_npcs(200), 100),
+    Scenario("update_npcs_2000", update_npcs(2000), 20),
+    Scenario("update_npcs_2000_spread", update_npcs_spread(2000, False), 50),
+    Scenario("update_npcs_2000_spread_lod", update_npcs_spread(2000, True), 50),
+    Scenario("update_bullets_100", update_bullets(100), 200, 20),
+    Scenario("update_bullets_1000", update_bullets(1000), 200, 20),
+    Scenario("update_bullets_10000", update_bullets(10000), 100, 10),
+    Scenario("render_frame", render_frame(20), 200),
+    Scenario("render_npcs_1000", render_npcs(1000), 100),
+    Scenario("render_bullets_5000", render_bullets(5000), 100),
+    Scenario("startup_imports", startup("imports"), 5),
+    Scenario("startup_first_menu_frame", startup("first_menu_frame"), 5),
+]
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of timings"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def run_scenario(scenario, samples):
+    prepare, run = scenario.setup()
+    timings = []
+    for i in range(WARMUP_SAMPLES + samples):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        for _ in range(scenario.iterations):
+            measured = run()
+        elapsed = (time.perf_counter() - start) * 1000 / scenario.iterations
+        if measured is not None:
+            elapsed = measured
+        if i >= WARMUP_SAMPLES:
+            timings.append(elapsed)
+    return {
+        'samples': samples,
+        'iterations': scenario.iterations,
+        'median_ms': statistics.median(timings),
+        'p99_ms': percentile(timings, 0.99),
+    }
+
+def compare(results, baseline, threshold):
+    """Print each scenario against the baseline, returning the names that regressed"""
+    regressions = []
+    print(f"{'scenario':<26} {'median ms':>10} {'p99 ms':>9} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<26} {result['median_ms']:>10.3f} {result['p99_ms']:>9.3f} {'-':>10} {'-':>8}")
+            continue
+        change = result['median_ms'] / base['median_ms'] - 1
+        flag = ""
+        if change > threshold and result['median_ms'] - base['median_ms'] > MIN_REGRESSION_MS:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<26} {result['median_ms']:>10.3f} {result['p99_ms']:>9.3f} "
+              f"{base['median_ms']:>10.3f} {change:>+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help="where to write the JSON results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed median slowdown as a fraction (default %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to the baseline file")
+    parser.add_argument('--filter', default="", help="only run scenarios whose name contains this")
+    parser.add_argument('--samples', type=float, default=1.0, help="scale every scenario's sample count")
+    args = parser.parse_args()
+
+    game.init()
+    results = {}
+    for scenario in SCENARIOS:
+        if args.filter in scenario.name:
+            samples = max(1, int(scenario.samples * args.samples))
+            results[scenario.name] = run_scenario(scenario, samples)
+
+    report = {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'scenarios': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['scenarios']
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
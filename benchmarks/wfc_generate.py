@@ -0,0 +1,27 @@
+"""Time TileMap.generate_wfc_map across map sizes.
+
+Run from the project root with: python -m benchmarks.wfc_generate
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import random
+import time
+import maps
+
+MAP_SIZES = [(38, 29), (64, 64), (128, 128), (256, 256), (512, 512)]
+
+def main():
+    print(f"{'size':>10} {'cells':>8} {'seconds':>9} {'us/cell':>8}")
+    for width, height in MAP_SIZES:
+        random.seed(0)
+        tilemap = maps.TileMap(width, height)
+        start = time.perf_counter()
+        tilemap.generate_wfc_map()
+        elapsed = time.perf_counter() - start
+        cells = width * height
+        print(f"{width:>4}x{height:<5} {cells:>8} {elapsed:>9.3f} {elapsed / cells * 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
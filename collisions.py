@@ -0,0 +1,123 @@
+import math
+import numpy as np
+from sounds import sounds
+import logic
+from projectiles import OWNER_PLAYER, OWNER_NPC
+import spatial
+
+def resolve_bullet_hits(game_state):
+    """Resolve NPC and player bullets against the NPCs in one pass per tick"""
+    resolve_npc_bullets(game_state)
+    resolve_player_bullets(game_state)
+    game_state.projectiles.compact()
+
+def bucket_projectiles(projectiles, indices, cell_size):
+    """Sort projectile indices by grid cell, returning the sorted keys and indices"""
+    keys, order = spatial.bucket(projectiles.x[indices], projectiles.y[indices], cell_size)
+    return keys[order], indices[order]
+
+def nearby_projectiles(sorted_keys, sorted_indices, cells_x, cells_y, x_span, y_span):
+    """For each (cells_x, cells_y) cell, the projectile indices in the cells around it"""
+    cells_x = np.asarray(cells_x, dtype=np.int64)
+    rows = (np.asarray(cells_y, dtype=np.int64)[:, None] + np.arange(y_span[0], y_span[1] + 1)) * spatial.CELL_STRIDE
+    starts = np.searchsorted(sorted_keys, rows + (cells_x + x_span[0])[:, None], "left").tolist()
+    ends = np.searchsorted(sorted_keys, rows + (cells_x + x_span[1])[:, None], "right").tolist()
+
+    for row_starts, row_ends in zip(starts, ends):
+        parts = [sorted_indices[start:end] for start, end in zip(row_starts, row_ends) if end > start]
+        if not parts:
+            yield None
+        else:
+            # Sorting by pool index puts the candidates back in firing order
+            yield np.sort(np.concatenate(parts))
+
+def resolve_npc_bullets(game_state):
+    projectiles = game_state.projectiles
+    indices = projectiles.live(OWNER_NPC)
+    if not len(indices):
+        return
+
+    # Same truncated bullet rect that pygame.Rect would build
+    bullet_size = game_state.bullet_size
+    left = np.trunc(projectiles.x[indices] - bullet_size // 2)
+    top = np.trunc(projectiles.y[indices] - bullet_size // 2)
+
+    # Check collision with player
+    player_rect = game_state.player_rect
+    hits_player = ((left < player_rect.right) & (player_rect.left < left + bullet_size) &
+                   (top < player_rect.bottom) & (player_rect.top < top + bullet_size))
+    for i in indices[hits_player].tolist():
+        game_state.damage_player(float(projectiles.damage[i]))
+        sounds.play_sound("pain")
+    projectiles.kill(indices[hits_player])
+
+    indices = indices[~hits_player]
+    if not len(indices) or not game_state.npcs:
+        return
+
+    # Check collision with NPCs, each bullet goes to the first NPC it overlaps
+    cell_size = game_state.npc_size
+    sorted_keys, sorted_indices = bucket_projectiles(projectiles, indices, cell_size)
+    npcs = list(game_state.npcs)
+    cells_x = [npc.rect.x // cell_size for npc in npcs]
+    cells_y = [npc.rect.y // cell_size for npc in npcs]
+    nearby = nearby_projectiles(sorted_keys, sorted_indices, cells_x, cells_y, (-1, 2), (-1, 2))
+
+    for npc, candidates in zip(npcs, nearby):
+        if candidates is None:
+            continue
+        rect = npc.rect
+        candidate_left = np.trunc(projectiles.x[candidates] - bullet_size // 2)
+        candidate_top = np.trunc(projectiles.y[candidates] - bullet_size // 2)
+        overlaps = (projectiles.alive[candidates] &
+                    (candidate_left < rect.right) & (rect.left < candidate_left + bullet_size) &
+                    (candidate_top < rect.bottom) & (rect.top < candidate_top + bullet_size))
+        for i in candidates[overlaps].tolist():
+            projectiles.alive[i] = False
+            npc.hit()  # Enemy takes damage
+            if npc.health > 0:
+                sounds.play_sound("pain")
+            else:
+                game_state.remove_npc(npc)
+                sounds.play_sound("dead")
+                break
+
+def resolve_player_bullets(game_state):
+    projectiles = game_state.projectiles
+    indices = projectiles.live(OWNER_PLAYER)
+    if not len(indices) or not game_state.npcs:
+        return
+
+    npc_size = game_state.npc_size
+    sorted_keys, sorted_indices = bucket_projectiles(projectiles, indices, npc_size)
+    npcs = list(game_state.npcs)
+    cells_x = [int(npc.pos.x // npc_size) for npc in npcs]
+    cells_y = [int(npc.pos.y // npc_size) for npc in npcs]
+    nearby = nearby_projectiles(sorted_keys, sorted_indices, cells_x, cells_y, (0, 1), (0, 1))
+
+    # Each NPC takes at most one bullet per tick, earlier NPCs get first pick
+    for npc, candidates in zip(npcs, nearby):
+        if candidates is None:
+            continue
+        x = projectiles.x[candidates]
+        y = projectiles.y[candidates]
+        inside = (projectiles.alive[candidates] &
+                  (npc.pos.x < x) & (x < npc.pos.x + npc_size) &
+                  (npc.pos.y < y) & (y < npc.pos.y + npc_size))
+        hits = candidates[inside]
+        if not len(hits):
+            continue
+
+        i = hits[0]
+        projectiles.alive[i] = False
+        npc.hit(float(projectiles.damage[i]))
+        if npc.health <= 0:
+            # Calculate distance between player and NPC
+            dx = npc.pos.x - game_state.player_pos[0]
+            dy = npc.pos.y - game_state.player_pos[1]
+            distance = math.sqrt(dx**2 + dy**2)
+            score = logic.calculate_score(distance, game_state)
+            game_state.score += score
+            sounds.play_sound("dead")
+            game_state.add_floating_score(score, npc.pos)
+            game_state.remove_npc(npc)
@@ -6,7 +6,36 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 WIDTH, HEIGHT = 1024, 768
 LEVEL_WIDTH, LEVEL_HEIGHT = 2432, 1856
 TILE_SIZE = 64
+ROTATION_STEPS = 64  # Angles pre-rendered per rotated sprite (see graphics.RotationAtlas)
+MAP_SEED = None  # Set to an int for a reproducible map, cached under MAP_CACHE_DIR
+MAP_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "maps")
+WFC_BACKTRACKING = False  # Backtrack on contradictions so maps never break the tile rules
+
+# Open world: the map is streamed in chunks by background workers (see world.py)
+OPEN_WORLD = False
+WORLD_CHUNK_TILES = 16
+WORLD_CHUNKS = (64, 64)
+if OPEN_WORLD:
+    LEVEL_WIDTH = WORLD_CHUNKS[0] * WORLD_CHUNK_TILES * TILE_SIZE
+    LEVEL_HEIGHT = WORLD_CHUNKS[1] * WORLD_CHUNK_TILES * TILE_SIZE
 MAX_NPCS = 20
+TICK_RATE = 60  # Simulation ticks per second, speeds and timers are counted in ticks
+MAX_TICKS_PER_FRAME = 5  # After a stall, drop simulation time beyond this instead of catching up
+RENDER_FPS = 120  # Frame cap for drawing, independent of TICK_RATE. 0 leaves it uncapped
+MENU_FPS = 30  # How often menus check for input, they only redraw after some
+PROFILER_TOGGLE_KEY = pygame.K_F3  # Frame timing overlay (see profiler.py)
+PROFILER_DUMP_KEY = pygame.K_F4  # Write the recorded frame timings to profiles/
+NPC_BACKEND = "objects"  # "crowd" keeps NPC state in NumPy arrays (see crowd.py)
+AI_LOD = False  # Update NPCs away from the view less often (see lod.py), objects backend only
+AI_LOD_NEAR = 128  # Pixels outside the view within which NPCs update every tick
+AI_LOD_MID = 512  # ...and within which they update every AI_LOD_MID_INTERVAL ticks
+AI_LOD_MID_INTERVAL = 4
+AI_LOD_FAR_INTERVAL = 16
+POPULATION = 0  # NPCs kept across the level as dormant records (see population.py), 0 spawns at random instead
+POPULATION_MAX_LIVE = 300  # Live NPCs the population promotes up to
+POPULATION_MARGIN = 200  # Distance outside the view at which dormant NPCs are promoted
+AI_JOBS = False  # Queue NPC decisions and run them within a frame budget (see jobs.py)
+AI_JOB_BUDGET_MS = 2.0  # Time per frame spent on queued AI jobs
 
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -26,6 +55,10 @@ PLAYER_MAX_HEALTH = 100
 PLAYER_MAX_ARMOR = 50
 ARMOR_EFFECTIVENESS = 0.5
 
+# Assets listed in assets.json can be packed into one file with: python assets.py pack
+ASSET_BUNDLE = os.path.join(PROJECT_ROOT, "assets.bundle")
+USE_ASSET_BUNDLE = False  # Read assets from ASSET_BUNDLE when it exists
+
 image_files = {
     "pistol": os.path.join(PROJECT_ROOT, "images/pistol.png"),
     "machine_gun": os.path.join(PROJECT_ROOT, "images/machinegun.png"),
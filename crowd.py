@@ -0,0 +1,276 @@
+import numpy as np
+import pygame
+from pygame.math import Vector2
+import config
+from npc import NPC, NPC_HEALTH
+
+WALK = 0
+IDLE = 1
+STATES = ("walk", "idle")
+
+# Per-NPC arrays kept by the crowd, in slot order
+FIELDS = {
+    "x": np.float64,
+    "y": np.float64,
+    "prev_x": np.float64,  # Position at the start of the tick, for interpolated drawing
+    "prev_y": np.float64,
+    "dir_x": np.float64,
+    "dir_y": np.float64,
+    "rect_x": np.int64,
+    "rect_y": np.int64,
+    "state": np.int8,
+    "state_timer": np.int64,
+    "collision_cooldown": np.int64,
+    "shoot_cooldown": np.int64,
+    "alert_cooldown": np.int64,
+    "health": np.float64,
+    "is_alerted": np.bool_,
+    "has_gun": np.bool_,
+}
+
+class NPCCrowd:
+    """Crowd backend that keeps every NPC's state in parallel NumPy arrays.
+
+    Live NPCs occupy slots [0, count). Each one is exposed through a CrowdNPC
+    view, and removing an NPC moves the last slot into the hole.
+    """
+    def __init__(self, npc_size, npc_speed, capacity=256, seed=None):
+        self.npc_size = npc_size
+        self.npc_speed = npc_speed
+        self.capacity = capacity
+        self.count = 0
+        self.views = []
+        self.rng = np.random.default_rng(seed)
+        for name, dtype in FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        self.capacity *= 2
+        for name, dtype in FIELDS.items():
+            array = np.zeros(self.capacity, dtype=dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    def allocate(self, view):
+        if self.count == self.capacity:
+            self.grow()
+        slot = self.count
+        for name in FIELDS:
+            getattr(self, name)[slot] = 0
+        self.views.append(view)
+        self.count += 1
+        return slot
+
+    def release(self, view):
+        slot = view.slot
+        if slot is None:
+            return
+        last = self.count - 1
+        if slot != last:
+            for name in FIELDS:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.views[last]
+            moved.slot = slot
+            self.views[slot] = moved
+        self.views.pop()
+        self.count -= 1
+        view.slot = None
+
+    def spawn(self, x, y, game_state):
+        return CrowdNPC(x, y, game_state)
+
+    def random_directions(self, count):
+        directions = self.rng.uniform(-1, 1, (count, 2))
+        lengths = np.hypot(directions[:, 0], directions[:, 1])
+        lengths[lengths == 0] = 1
+        return directions[:, 0] / lengths, directions[:, 1] / lengths
+
+    def change_states(self, slots):
+        """Batched NPC.change_state for the given slots"""
+        walking = self.state[slots] == WALK
+        stop = walking & (self.rng.random(len(slots)) < 0.3)  # 30% chance to stop
+
+        stopping = slots[stop]
+        self.state[stopping] = IDLE
+        self.state_timer[stopping] = self.rng.integers(config.TICK_RATE // 2, 3 * config.TICK_RATE // 2 + 1, len(stopping))
+
+        # Everything else (re)starts walking in a new direction
+        walkers = slots[~stop]
+        self.state[walkers] = WALK
+        self.dir_x[walkers], self.dir_y[walkers] = self.random_directions(len(walkers))
+        self.state_timer[walkers] = self.rng.integers(config.TICK_RATE, 3 * config.TICK_RATE + 1, len(walkers))
+
+    def advance(self, camera_pos):
+        """Move, tick timers and clamp the whole crowd, returning the NPCs to despawn"""
+        n = self.count
+        if not n:
+            return []
+        x = self.x[:n]
+        y = self.y[:n]
+
+        walking = self.state[:n] == WALK
+        x += np.where(walking, self.dir_x[:n] * self.npc_speed, 0)
+        y += np.where(walking, self.dir_y[:n] * self.npc_speed, 0)
+
+        # Keep NPCs within level bounds
+        np.clip(x, 0, config.LEVEL_WIDTH - self.npc_size, out=x)
+        np.clip(y, 0, config.LEVEL_HEIGHT - self.npc_size, out=y)
+
+        collision_cooldown = self.collision_cooldown[:n]
+        collision_cooldown -= collision_cooldown > 0
+        alert_cooldown = self.alert_cooldown[:n]
+        alert_cooldown -= alert_cooldown > 0
+        shoot_cooldown = self.shoot_cooldown[:n]
+        shoot_cooldown -= shoot_cooldown > 0
+
+        state_timer = self.state_timer[:n]
+        state_timer -= 1
+        expired = np.flatnonzero(state_timer <= 0)
+        if len(expired):
+            self.change_states(expired)
+
+        self.rect_x[:n] = x
+        self.rect_y[:n] = y
+
+        screen_x = x - camera_pos[0]
+        screen_y = y - camera_pos[1]
+        outside = ((screen_x < -config.WIDTH) | (screen_x > config.WIDTH * 2) |
+                   (screen_y < -config.HEIGHT) | (screen_y > config.HEIGHT * 2))
+        return [self.views[i] for i in np.flatnonzero(outside)]
+
+    def save_positions(self):
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def render_columns(self):
+        """The arrays npc.NPCRenderer.draw takes, as views of the live slots"""
+        n = self.count
+        return (self.prev_x[:n], self.prev_y[:n], self.x[:n], self.y[:n],
+                self.has_gun[:n], self.health[:n], NPC_HEALTH)
+
+    def push_from_player(self, player_pos, player_size):
+        """Step every NPC overlapping the player one NPC_SPEED away from them"""
+        n = self.count
+        if not n:
+            return
+        left = int(player_pos[0] - player_size // 2)
+        top = int(player_pos[1] - player_size // 2)
+        npc_left = np.trunc(self.x[:n])
+        npc_top = np.trunc(self.y[:n])
+        touching = np.flatnonzero((npc_left < left + player_size) & (left < npc_left + self.npc_size) &
+                                  (npc_top < top + player_size) & (top < npc_top + self.npc_size))
+        if not len(touching):
+            return
+
+        dx = self.x[touching] - player_pos[0]
+        dy = self.y[touching] - player_pos[1]
+        lengths = np.hypot(dx, dy)
+        moving = lengths > 0
+        touching, dx, dy, lengths = touching[moving], dx[moving], dy[moving], lengths[moving]
+        self.x[touching] += dx / lengths * self.npc_speed
+        self.y[touching] += dy / lengths * self.npc_speed
+
+    def step(self, game_state):
+        """Crowd counterpart of the per-NPC loop in npc.update_npcs"""
+        for npc in self.advance(game_state.camera_pos):
+            game_state.despawn_npc(npc)
+
+        # Armed NPCs are a small share of the crowd, so they still shoot one by one
+        for slot in np.flatnonzero(self.has_gun[:self.count]).tolist():
+            npc = self.views[slot]
+            if npc.is_alerted and npc.alert_cooldown <= 0:
+                npc.queue_shot()
+            if npc.shoot_cooldown <= 0:
+                npc.queue_shot()
+
+        self.push_from_player(game_state.player_pos, game_state.player_size)
+
+class SlotVector(Vector2):
+    """Copy of a vector kept in crowd arrays, which refuses component writes.
+
+    Changing the copy would not reach the crowd, so assign a whole vector to
+    the NPC attribute instead. Arithmetic on one gives another SlotVector,
+    wrap it in Vector2() to get one that can be changed.
+    """
+    def __setattr__(self, name, value):
+        raise AttributeError(f"can't set {name} on a copy of crowd NPC state, assign the whole vector")
+
+    def __setitem__(self, index, value):
+        raise TypeError("can't set items on a copy of crowd NPC state, assign the whole vector")
+
+def array_field(name, cast):
+    def get(self):
+        return cast(getattr(self.crowd, name)[self.slot])
+
+    def set(self, value):
+        getattr(self.crowd, name)[self.slot] = value
+
+    return property(get, set)
+
+class CrowdNPC(NPC):
+    """NPC whose state lives in an NPCCrowd slot, for code that needs one entity.
+
+    The crowd advances these in bulk, so NPC.update is not called on them.
+    """
+    def __init__(self, x, y, game_state):
+        self.crowd = game_state.crowd
+        self.slot = self.crowd.allocate(self)
+        super().__init__(x, y, game_state)
+
+    @property
+    def pos(self):
+        return SlotVector(self.crowd.x[self.slot], self.crowd.y[self.slot])
+
+    @pos.setter
+    def pos(self, value):
+        self.crowd.x[self.slot] = value[0]
+        self.crowd.y[self.slot] = value[1]
+
+    @property
+    def prev_pos(self):
+        return SlotVector(self.crowd.prev_x[self.slot], self.crowd.prev_y[self.slot])
+
+    @prev_pos.setter
+    def prev_pos(self, value):
+        self.crowd.prev_x[self.slot] = value[0]
+        self.crowd.prev_y[self.slot] = value[1]
+
+    @property
+    def direction(self):
+        return SlotVector(self.crowd.dir_x[self.slot], self.crowd.dir_y[self.slot])
+
+    @direction.setter
+    def direction(self, value):
+        self.crowd.dir_x[self.slot] = value[0]
+        self.crowd.dir_y[self.slot] = value[1]
+
+    @property
+    def rect(self):
+        return pygame.Rect(int(self.crowd.rect_x[self.slot]), int(self.crowd.rect_y[self.slot]),
+                           self.crowd.npc_size, self.crowd.npc_size)
+
+    @rect.setter
+    def rect(self, value):
+        self.crowd.rect_x[self.slot] = value.x
+        self.crowd.rect_y[self.slot] = value.y
+
+    @property
+    def state(self):
+        return STATES[self.crowd.state[self.slot]]
+
+    @state.setter
+    def state(self, value):
+        self.crowd.state[self.slot] = STATES.index(value)
+
+    state_timer = array_field("state_timer", int)
+    collision_cooldown = array_field("collision_cooldown", int)
+    shoot_cooldown = array_field("shoot_cooldown", int)
+    alert_cooldown = array_field("alert_cooldown", int)
+    health = array_field("health", float)
+    is_alerted = array_field("is_alerted", bool)
+    has_gun = array_field("has_gun", bool)
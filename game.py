@@ -1,8 +1,9 @@
+import startup  # First, so start-up timing covers every other import
 import pygame
-pygame.init()
 import sys
 import os
 import math
+import time
 import config
 import npc as npc
 from npc import update_npcs, spawn_npc
@@ -13,30 +14,54 @@ import menu
 import player
 import weapons
 import maps
+import projectiles
+import crowd
+import jobs
+import lod
+import population
+import world
+import assets
 from maps import Minimap
 from pygame.math import Vector2
 from collections import defaultdict
 from sounds import sounds
+from profiler import profiler
 from os import path
 
+startup.mark("imports")
+
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
 loaded_images = {}
 
-for image_name, file_path in config.image_files.items():
-    try:
-        # Create absolute path for the image file
-        abs_path = os.path.join(PROJECT_ROOT, file_path)
-        loaded_images[image_name] = pygame.image.load(abs_path).convert_alpha()
-    except (pygame.error, FileNotFoundError) as e:
-        print(f"Couldn't load image {file_path}: {e}")
-        print(f"Tried to load from: {abs_path}")
-        loaded_images[image_name] = None
+def init():
+    """Start the parts of pygame the menus need and open the window.
+
+    Not pygame.init(), which would also open the audio device. The mixer
+    starts when the first sound or music is played, and assets load when
+    first needed.
+    """
+    pygame.display.init()
+    pygame.font.init()
+    graphics.init_display()
+
+def load_images():
+    if loaded_images:
+        return
+    for image_name, file_path in config.image_files.items():
+        try:
+            # Create absolute path for the image file
+            abs_path = os.path.join(PROJECT_ROOT, file_path)
+            loaded_images[image_name] = assets.loader.image(abs_path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Couldn't load image {file_path}: {e}")
+            print(f"Tried to load from: {abs_path}")
+            loaded_images[image_name] = None
 
 class GameState:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.paused = False
-        self.bullets = []
+        self.projectiles = projectiles.ProjectilePool()
         self.npcs = []
         self.weapons = []
         self.floating_scores = []
@@ -58,14 +83,32 @@ class GameState:
         self.npc_size = npc.NPC_SIZE
         self.npc_speed = npc.NPC_SPEED
         self.npc_spawn_rate = npc.NPC_SPAWN_RATE
+        self.spawn_timer = 0
+        if config.NPC_BACKEND == "crowd":
+            self.crowd = crowd.NPCCrowd(self.npc_size, self.npc_speed, seed=seed)
+        else:
+            self.crowd = None
+        self.ai_lod = lod.LODScheduler() if config.AI_LOD else None
+        self.ai_jobs = jobs.JobScheduler(inline=not config.AI_JOBS)
         self.player_surface = self.create_player_surface()
+        self.player_atlas = graphics.RotationAtlas(self.player_surface)
+        self.npc_renderer = npc.NPCRenderer(self.npc_size)
         self.player_collision_cooldown = 0
-        self.tilemap = maps.TileMap(config.LEVEL_WIDTH // config.TILE_SIZE, config.LEVEL_HEIGHT // config.TILE_SIZE)
-        self.tilemap.generate_wfc_map()
+        self.ticks = 0  # Simulation ticks run so far
+        self.prev_player_pos = list(self.player_pos)
+        self.prev_camera_pos = list(self.camera_pos)
+        map_seed = seed if seed is not None else config.MAP_SEED
+        if config.OPEN_WORLD:
+            self.tilemap = world.StreamingTileMap(config.WORLD_CHUNKS[0], config.WORLD_CHUNKS[1],
+                                                  config.WORLD_CHUNK_TILES, map_seed,
+                                                  config.WFC_BACKTRACKING)
+        else:
+            self.tilemap = maps.TileMap(config.LEVEL_WIDTH // config.TILE_SIZE, config.LEVEL_HEIGHT // config.TILE_SIZE)
+            self.tilemap.generate_wfc_map(config.WFC_BACKTRACKING, map_seed)
         self.player_rect = pygame.Rect(self.player_pos[0], self.player_pos[1], self.player_size, self.player_size)
         self.bullet_speed = 10
         self.bullet_size = 5
-        self.npc_bullets = []
+        self.bullet_renderer = weapons.BulletRenderer(self.bullet_size)
         self.shoot_cooldown = 0
         self.weapons = weapons.load_weapons('weapons.json')
         self.player_has_shot = False
@@ -83,6 +126,11 @@ class GameState:
             config.LEVEL_WIDTH,
             config.LEVEL_HEIGHT
         )
+        if config.POPULATION:
+            self.population = population.Population(seed=map_seed)
+            self.population.populate(config.POPULATION, self.npc_size)
+        else:
+            self.population = None
 
     @property
     def current_weapon(self):
@@ -109,24 +157,54 @@ class GameState:
     def create_player_surface(self):
         return graphics.svg_to_pygame_surface(player.PLAYER_SVG, self.player_size, self.player_size)
     
+    def time_ms(self):
+        """Simulation time in milliseconds, for timers such as Weapon.fire_rate"""
+        return self.ticks * 1000 / config.TICK_RATE
+
+    def save_positions(self):
+        """Remember where everything was before the next tick, for interpolated drawing"""
+        self.prev_player_pos[:] = self.player_pos
+        self.prev_camera_pos[:] = self.camera_pos
+        if self.crowd is not None:
+            self.crowd.save_positions()
+        else:
+            for npc in self.npcs:
+                npc.prev_pos.update(npc.pos)
+
+    def npc_columns(self):
+        """Per-NPC arrays for npc_renderer"""
+        if self.crowd is not None:
+            return self.crowd.render_columns()
+        return npc.render_columns(self.npcs)
+
+    def interpolate(self, previous, current, alpha):
+        return [previous[0] + (current[0] - previous[0]) * alpha,
+                previous[1] + (current[1] - previous[1]) * alpha]
+
     def update_player_rect(self):
         self.player_rect.x = self.player_pos[0] - self.player_size // 2
         self.player_rect.y = self.player_pos[1] - self.player_size // 2
 
     def add_bullet(self, x, y, vx, vy, damage):
-        self.bullets.append([x, y, vx, vy, damage])
-
-    def remove_bullet(self, bullet):
-        self.bullets.remove(bullet)
+        self.projectiles.add(x, y, vx, vy, damage, projectiles.OWNER_PLAYER)
 
     def add_npc(self, npc):
         self.npcs.append(npc)
 
     def remove_npc(self, npc):
         self.npcs.remove(npc)
+        npc.live = False
+        if self.crowd is not None:
+            self.crowd.release(npc)
+
+    def despawn_npc(self, npc):
+        """Remove an NPC that strayed too far from the view, keeping it dormant if there is a population"""
+        if self.population is not None:
+            self.population.demote(npc)
+        self.remove_npc(npc)
 
     def add_npc_bullet(self, x, y, vx, vy, damage):
-        self.npc_bullets.append([x, y, vx, vy, damage])
+        self.projectiles.add(x, y, vx, vy, damage, projectiles.OWNER_NPC)
 
     def damage_player(self, damage):
         if self.player_armor > 0:
@@ -150,12 +228,26 @@ class GameState:
         self.floating_scores.append({
             'text': str(score),
             'pos': Vector2(pos),
-            'time': 60
+            'time': config.TICK_RATE  # Ticks, shown for one second
         })
 
-def main():
+def main(profile_startup=False, profile_path=None):
+    init()
+    startup.mark("init")
+
+    def first_menu_frame():
+        startup.mark("first_menu_frame")
+        if not profile_startup:
+            return False
+        print(startup.report())
+        if profile_path:
+            startup.save(profile_path)
+        return True  # Leave the menu, the start-up profile is all that was asked for
+
+    on_first_frame = first_menu_frame
     while True:
-        choice = menu.main_menu()
+        choice = menu.main_menu(on_first_frame)
+        on_first_frame = None
         if choice == "start":
             result = game()
             if result == "main_menu":
@@ -167,7 +259,42 @@ def main():
         elif choice == "exit":
             break
 
+def step_simulation(game_state, dx, dy):
+    """Advance the world by one tick, with the player moving by (dx, dy)"""
+    game_state.ticks += 1
+    player.move_player(game_state, dx, dy)
+    graphics.update_camera(game_state)
+    if config.OPEN_WORLD:
+        game_state.tilemap.stream(game_state.camera_pos)
+    profiler.mark("move_player")
+
+    # Update game state
+    weapons.update_bullets(game_state)
+    profiler.mark("bullets")
+    update_npcs(game_state)
+    logic.update_floating_scores(game_state)
+    game_state.update_player_rect()
+    profiler.mark("npcs")
+
+    if game_state.population is not None:
+        game_state.population.promote(game_state)
+    else:
+        game_state.spawn_timer += 1
+        if game_state.spawn_timer >= game_state.npc_spawn_rate:
+            spawn_npc(game_state)
+            game_state.spawn_timer = 0
+
+    if game_state.player_collision_cooldown > 0:
+        game_state.player_collision_cooldown -= 1
+
+    if game_state.shoot_cooldown > 0:
+        game_state.shoot_cooldown -= 1
+    profiler.mark("spawning")
+
 def game():
+    # Gameplay assets, the menus don't need these
+    load_images()
+    sounds.load_effects()
     game_state = GameState()
     controls = menu.load_controls()
     music_volume, sfx_volume = menu.load_volume_settings()
@@ -178,9 +305,18 @@ def game():
     
     running = True
     clock = pygame.time.Clock()
-    spawn_timer = 0
+    tick_seconds = 1 / config.TICK_RATE
+    accumulator = 0.0
+    previous_time = time.perf_counter()
+    dirty = graphics.DirtyRects()
+    presented_view = None  # Camera position and terrain bake count of the last frame
     
     while running:
+        profiler.begin_frame()
+        # The simulation runs in fixed ticks, however long the last frame took
+        now = time.perf_counter()
+        accumulator += min(now - previous_time, config.MAX_TICKS_PER_FRAME * tick_seconds)
+        previous_time = now
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -198,8 +334,14 @@ def game():
                         result = menu.pause_menu(game_state)
                         if result == "main_menu":
                             return "main_menu"
+                        previous_time = time.perf_counter()  # Don't catch up on time spent in the menu
+                        dirty.invalidate()
                 elif event.key == pygame.K_m:
                     return "main_menu"
+                elif event.key == config.PROFILER_TOGGLE_KEY:
+                    profiler.toggle()
+                elif event.key == config.PROFILER_DUMP_KEY and profiler.enabled:
+                    print(f"Frame timings written to {profiler.dump()}")
             if event.type == pygame.KEYUP:
                 if event.key == controls["weapon_wheel"]:
                     weapon_wheel.active = False
@@ -208,11 +350,11 @@ def game():
                 if event.type == pygame.MOUSEBUTTONDOWN and 1 <= controls["shoot"] <= 5:
                     if event.button == controls["shoot"]:
                         mx, my = pygame.mouse.get_pos()
-                        weapons.shoot(game_state, mx, my)
+                        weapons.shoot(game_state, mx, my, game_state.time_ms())
                 elif event.type == pygame.KEYDOWN:
                     if event.key == controls["shoot"]:
                         mx, my = pygame.mouse.get_pos()
-                        weapons.shoot(game_state, mx, my)
+                        weapons.shoot(game_state, mx, my, game_state.time_ms())
 
         # Handle player movement
         if not game_state.paused:
@@ -226,88 +368,87 @@ def game():
                 dy -= game_state.player_speed
             if keys[controls["down"]]:
                 dy += game_state.player_speed
+            profiler.mark("events")
         
-            player.move_player(game_state, dx, dy)
-            graphics.update_camera(game_state)
+            while accumulator >= tick_seconds:
+                game_state.save_positions()
+                step_simulation(game_state, dx, dy)
+                accumulator -= tick_seconds
 
-            # Update game state
-            weapons.update_bullets(game_state)
-            weapons.update_npc_bullets(game_state)
-            update_npcs(game_state)
-            logic.update_floating_scores(game_state)
-            game_state.update_player_rect()
+                # Check for player collision after all updates
+                if game_state.player_health <= 0:
+                    running = False
+                    break
 
-            if weapon_wheel.active:
-                weapon_wheel.handle_mouse(pygame.mouse.get_pos())
-        
-            spawn_timer += 1
-            if spawn_timer >= game_state.npc_spawn_rate:
-                spawn_npc(game_state)
-                spawn_timer = 0
-        
-            if game_state.player_collision_cooldown > 0:
-                game_state.player_collision_cooldown -= 1
-            
-            if game_state.shoot_cooldown > 0:
-                game_state.shoot_cooldown -= 1
-            
-            # Check for player collision after all updates
-            if game_state.player_health <= 0:
-                running = False
+            if not running:
                 graphics.game_over(game_state)
                 break  # Exit the game loop immediately
+
+            # NPC decisions get a fixed slice of the frame, the rest waits for the next one
+            game_state.ai_jobs.run()
+            profiler.mark("ai")
+
+            if weapon_wheel.active:
+                weapon_wheel.handle_mouse(pygame.mouse.get_pos())
+        else:
+            accumulator = 0.0
+
+        # Draw everything alpha of the way from the previous tick to the latest one
+        alpha = accumulator / tick_seconds
+        camera_pos = game_state.interpolate(game_state.prev_camera_pos, game_state.camera_pos, alpha)
+        player_pos = game_state.interpolate(game_state.prev_player_pos, game_state.player_pos, alpha)
         
         # Drawing code
         graphics.screen.fill(config.BLACK)
-        maps.render_tilemap(graphics.screen, game_state.tilemap, game_state.camera_pos)
-        weapon_wheel.draw(graphics.screen)
+        maps.render_tilemap(graphics.screen, game_state.tilemap, camera_pos)
+        profiler.mark("tilemap")
+        dirty.add(weapon_wheel.draw(graphics.screen))
         game_state.minimap.update(game_state)
-        game_state.minimap.draw(graphics.screen)
+        dirty.add(game_state.minimap.draw(graphics.screen))
+        profiler.mark("minimap")
         
         # Draw player
         player_screen_pos = (
-            game_state.player_pos[0] - game_state.camera_pos[0],
-            game_state.player_pos[1] - game_state.camera_pos[1]
+            player_pos[0] - camera_pos[0],
+            player_pos[1] - camera_pos[1]
         )
         mouse_x, mouse_y = pygame.mouse.get_pos()
         angle = math.atan2(mouse_y - player_screen_pos[1], 
                            mouse_x - player_screen_pos[0])
-        rotated_player = pygame.transform.rotate(game_state.player_surface, 
-                                                 math.degrees(-angle) - 90)
-        player_rect = rotated_player.get_rect(center=player_screen_pos)
-        graphics.screen.blit(rotated_player, player_rect)
+        dirty.add(game_state.player_atlas.blit(graphics.screen, math.degrees(-angle) - 90, player_screen_pos))
+        profiler.mark("player_draw")
         
         # Draw NPCs
-        for npc in game_state.npcs:
-            npc.draw(graphics.screen, game_state.camera_pos)
+        dirty.add(*game_state.npc_renderer.draw(graphics.screen, game_state.npc_columns(), camera_pos, alpha))
+        profiler.mark("npc_draw")
         
         # Draw bullets
-        for bullet in game_state.bullets:
-            bullet_screen_pos = (
-                int(bullet[0] - game_state.camera_pos[0]),
-                int(bullet[1] - game_state.camera_pos[1])
-            )
-            pygame.draw.circle(graphics.screen, config.BULLET, bullet_screen_pos, game_state.bullet_size)
-
-        
-        for bullet in game_state.npc_bullets:
-            bullet_screen_pos = (
-                int(bullet[0] - game_state.camera_pos[0]),
-                int(bullet[1] - game_state.camera_pos[1])
-            )
-            pygame.draw.circle(graphics.screen, config.BULLET, bullet_screen_pos, game_state.bullet_size)
+        dirty.add(*game_state.bullet_renderer.draw(graphics.screen, game_state.projectiles, camera_pos, alpha))
+        profiler.mark("bullet_draw")
 
         # Display score, HUD
-        graphics.draw_text(f"$ {game_state.score}", config.WHITE, config.WIDTH - 100, 30)
-        graphics.draw_hud(game_state)
-        graphics.draw_ammo(game_state)
-        graphics.draw_floating_scores(graphics.screen, game_state)
+        dirty.add(graphics.draw_text(f"$ {game_state.score}", config.WHITE, config.WIDTH - 100, 30))
+        dirty.add(graphics.draw_hud(game_state))
+        dirty.add(graphics.draw_ammo(game_state))
+        dirty.add(*graphics.draw_floating_scores(graphics.screen, game_state, camera_pos))
 
         if game_state.paused:
-            graphics.draw_text("PAUSED", config.WHITE, config.WIDTH // 2, config.HEIGHT // 2)
+            dirty.add(graphics.draw_text("PAUSED", config.WHITE, config.WIDTH // 2, config.HEIGHT // 2))
+        profiler.mark("hud")
+        dirty.add(profiler.draw_overlay(graphics.screen))
+        profiler.mark("overlay")
 
-        pygame.display.flip()
-        clock.tick(60)
+        # Only what was drawn changes while the view holds still, a scroll or new terrain changes it all
+        view = (int(camera_pos[0]), int(camera_pos[1]), game_state.tilemap.terrain.bakes)
+        dirty.present(full=view != presented_view)
+        presented_view = view
+        profiler.mark("flip")
+        profiler.end_frame()
+        clock.tick(config.RENDER_FPS)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--profile-startup" in sys.argv:
+        args = sys.argv[sys.argv.index("--profile-startup") + 1:]
+        main(profile_startup=True, profile_path=args[0] if args else None)
+    else:
+        main()
\ No newline at end of file
@@ -1,13 +1,137 @@
 import pygame
 import io
+from collections import OrderedDict
 import config
 from sounds import sounds
 
-font = pygame.font.Font(None, 36)
-small_font = pygame.font.Font(None, 24)
+# Set by init_display(), importing this module has no side effects
+font = None
+small_font = None
+screen = None
 
-screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
-pygame.display.set_caption("Top-Down Shooter")
+def init_display():
+    """Open the window and create the fonts, the first time it is called"""
+    global font, small_font, screen
+    if screen is not None:
+        return
+    font = pygame.font.Font(None, 36)
+    small_font = pygame.font.Font(None, 24)
+    screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+    pygame.display.set_caption("Top-Down Shooter")
+
+TEXT_CACHE_SIZE = 256  # Rendered strings kept around, most frames reuse a few dozen
+
+class TextCache:
+    """LRU cache of rendered text surfaces, keyed by (font, text, color, antialias)"""
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        self.size = size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)  # Evict the least recently used text
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()
+
+DIRTY_RECT_LIMIT = 64  # More regions than this and one full flip is cheaper
+DIRTY_AREA_FRACTION = 0.5  # Likewise once the merged regions cover this much of the screen
+
+def merge_rects(rects):
+    """Union overlapping rects until no two overlap"""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+class DirtyRects:
+    """The regions of the screen drawn this frame, presented with display.update.
+
+    Whatever was drawn last frame is dirty as well, as it has to be painted
+    over. present() flips the whole screen instead when asked to (the camera
+    scrolled), after invalidate(), or when the regions add up to too much.
+    """
+    def __init__(self):
+        self.rects = []
+        self.previous = []
+        self.full = True  # Nothing has been presented yet
+
+    def add(self, *rects):
+        for rect in rects:
+            if rect:
+                self.rects.append(rect)
+
+    def invalidate(self):
+        """Flip the whole screen next time, e.g. after a menu drew over it"""
+        self.full = True
+
+    def present(self, full=False):
+        bounds = screen.get_rect()
+        rects = self.rects + self.previous
+        if not (full or self.full or len(rects) > DIRTY_RECT_LIMIT):
+            rects = merge_rects(clipped for clipped in (bounds.clip(rect) for rect in rects) if clipped)
+            area = sum(rect.width * rect.height for rect in rects)
+            full = area > bounds.width * bounds.height * DIRTY_AREA_FRACTION
+        else:
+            full = True
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        self.previous = self.rects
+        self.rects = []
+        self.full = False
+
+class RotationAtlas:
+    """A sprite pre-rotated to a fixed number of angles, so drawing it at
+    any angle is a lookup instead of a transform.rotate per frame."""
+    def __init__(self, surface, steps=config.ROTATION_STEPS):
+        self.steps = steps
+        self.frames = []
+        self.offsets = []  # Top-left of each frame relative to the sprite's center
+        for i in range(steps):
+            frame = pygame.transform.rotozoom(surface, i * 360 / steps, 1)
+            if pygame.display.get_surface() is not None:
+                frame = frame.convert_alpha()  # Match the display format for fast blits
+            self.frames.append(frame)
+            self.offsets.append((-(frame.get_width() // 2), -(frame.get_height() // 2)))
+
+    def index_for(self, degrees):
+        return round(degrees * self.steps / 360) % self.steps
+
+    def get(self, degrees):
+        return self.frames[self.index_for(degrees)]
+
+    def get_rect(self, degrees, center):
+        i = self.index_for(degrees)
+        frame = self.frames[i]
+        offset_x, offset_y = self.offsets[i]
+        return pygame.Rect(int(center[0]) + offset_x, int(center[1]) + offset_y, frame.get_width(), frame.get_height())
+
+    def blit(self, surface, degrees, center):
+        """Draw the sprite rotated counterclockwise by degrees, centered on center"""
+        i = self.index_for(degrees)
+        offset_x, offset_y = self.offsets[i]
+        return surface.blit(self.frames[i], (int(center[0]) + offset_x, int(center[1]) + offset_y))
 
 def svg_to_pygame_surface(svg_string, width, height):
     svg_bytes = svg_string.encode('utf-8')
@@ -17,10 +141,10 @@ def svg_to_pygame_surface(svg_string, width, height):
 def draw_text(text, color, x, y, custom_font=None):
     if custom_font is None:
         custom_font = font
-    text_surface = font.render(text, True, color)
+    text_surface = text_cache.render(custom_font, text, color)
     text_rect = text_surface.get_rect()
     text_rect.center = (x, y)
-    screen.blit(text_surface, text_rect)
+    return screen.blit(text_surface, text_rect)
 
 def update_camera(game_state):
     # Center the camera on the player
@@ -31,16 +155,23 @@ def update_camera(game_state):
     game_state.camera_pos[0] = max(0, min(game_state.camera_pos[0], config.LEVEL_WIDTH - config.WIDTH))
     game_state.camera_pos[1] = max(0, min(game_state.camera_pos[1], config.LEVEL_HEIGHT - config.HEIGHT))
 
-def draw_floating_scores(screen, game_state):
+def draw_floating_scores(screen, game_state, camera_pos=None):
+    if camera_pos is None:
+        camera_pos = game_state.camera_pos
+    rects = []
     for score in game_state.floating_scores:
         # Calculate screen position
         screen_pos = (
-            int(score['pos'].x - game_state.camera_pos[0]),
-            int(score['pos'].y - game_state.camera_pos[1])
+            int(score['pos'].x - camera_pos[0]),
+            int(score['pos'].y - camera_pos[1])
         )
-        draw_text(score['text'], config.YELLOW, screen_pos[0], screen_pos[1])
+        rects.append(draw_text(score['text'], config.YELLOW, screen_pos[0], screen_pos[1]))
+    return rects
 
-def draw_hud(game_state):
+def draw_hud(game_state, surface=None):
+    """Draw the health and armor bars, returning the area they cover"""
+    if surface is None:
+        surface = screen
     # Health bar
     health_bar_width = 200
     health_bar_height = 20
@@ -48,9 +179,9 @@ def draw_hud(game_state):
     health_bar_y = config.HEIGHT - 60
     health_fill = (game_state.player_health / game_state.player_max_health) * health_bar_width
     
-    pygame.draw.rect(screen, config.RED, (health_bar_x, health_bar_y, health_bar_width, health_bar_height))
-    pygame.draw.rect(screen, config.GREEN, (health_bar_x, health_bar_y, health_fill, health_bar_height))
-    pygame.draw.rect(screen, config.WHITE, (health_bar_x, health_bar_y, health_bar_width, health_bar_height), 2)
+    area = pygame.draw.rect(surface, config.RED, (health_bar_x, health_bar_y, health_bar_width, health_bar_height))
+    pygame.draw.rect(surface, config.GREEN, (health_bar_x, health_bar_y, health_fill, health_bar_height))
+    pygame.draw.rect(surface, config.WHITE, (health_bar_x, health_bar_y, health_bar_width, health_bar_height), 2)
     
     # Armor bar
     armor_bar_width = 200
@@ -59,26 +190,26 @@ def draw_hud(game_state):
     armor_bar_y = config.HEIGHT - 30
     armor_fill = (game_state.player_armor / game_state.player_max_armor) * armor_bar_width
     
-    pygame.draw.rect(screen, config.GRAY, (armor_bar_x, armor_bar_y, armor_bar_width, armor_bar_height))
-    pygame.draw.rect(screen, config.BLUE, (armor_bar_x, armor_bar_y, armor_fill, armor_bar_height))
-    pygame.draw.rect(screen, config.WHITE, (armor_bar_x, armor_bar_y, armor_bar_width, armor_bar_height), 2)
+    area.union_ip(pygame.draw.rect(surface, config.GRAY, (armor_bar_x, armor_bar_y, armor_bar_width, armor_bar_height)))
+    pygame.draw.rect(surface, config.BLUE, (armor_bar_x, armor_bar_y, armor_fill, armor_bar_height))
+    pygame.draw.rect(surface, config.WHITE, (armor_bar_x, armor_bar_y, armor_bar_width, armor_bar_height), 2)
     
     # Health and Armor text
-    health_text = small_font.render(f"Health: {int(game_state.player_health)}", True, config.WHITE)
-    armor_text = small_font.render(f"Armor: {int(game_state.player_armor)}", True, config.WHITE)
+    health_text = text_cache.render(small_font, f"Health: {int(game_state.player_health)}", config.WHITE)
+    armor_text = text_cache.render(small_font, f"Armor: {int(game_state.player_armor)}", config.WHITE)
 
-    screen.blit(health_text, (health_bar_x + health_bar_width + 10, health_bar_y))
-    screen.blit(armor_text, (armor_bar_x + armor_bar_width + 10, armor_bar_y))
+    area.union_ip(surface.blit(health_text, (health_bar_x + health_bar_width + 10, health_bar_y)))
+    area.union_ip(surface.blit(armor_text, (armor_bar_x + armor_bar_width + 10, armor_bar_y)))
+    return area
 
 def draw_ammo(game_state):
     weapon = game_state.current_weapon
-    ammo_text = font.render(f"{weapon.name}: {weapon.current_ammo}/{weapon.ammo_capacity}", True, config.WHITE)
+    ammo_text = text_cache.render(font, f"{weapon.name}: {weapon.current_ammo}/{weapon.ammo_capacity}", config.WHITE)
     ammo_rect = ammo_text.get_rect()
     ammo_rect.bottomright = (config.WIDTH - 10, config.HEIGHT - 10)
     weapon_rect = weapon.image.get_rect()
     weapon_rect.bottomright = (ammo_rect.left - 10, config.HEIGHT - 10)
-    screen.blit(ammo_text, ammo_rect)
-    screen.blit(weapon.image, weapon_rect)
+    return screen.blit(ammo_text, ammo_rect).union(screen.blit(weapon.image, weapon_rect))
 
 def game_over(game_state):
     sounds.play_sound("dead")
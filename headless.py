@@ -0,0 +1,130 @@
+"""Run the game simulation without a window, for load and soak testing.
+
+Run from the project root with: python headless.py --ticks 10000 --seed 1
+
+The player is driven by a scripted bot instead of the keyboard, and every
+random stream is seeded, so the same seed always ends in the same state
+digest. Nothing is drawn and the loop is not frame capped.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import hashlib
+import random
+import time
+import numpy as np
+import config
+import game
+import weapons
+
+BOT_TURN_INTERVAL = 90  # Ticks between changes of walking direction
+BOT_SHOOT_INTERVAL = 6  # Ticks between shots at the nearest NPC
+
+class Bot:
+    """Stand-in for the keyboard and mouse, with its own random stream"""
+    def __init__(self, seed):
+        self.rng = random.Random(f"bot:{seed}")
+        self.dx = 0
+        self.dy = 0
+
+    def step(self, game_state, tick):
+        if tick % BOT_TURN_INTERVAL == 0:
+            self.dx = self.rng.choice((-1, 0, 1)) * game_state.player_speed
+            self.dy = self.rng.choice((-1, 0, 1)) * game_state.player_speed
+
+        if tick % BOT_SHOOT_INTERVAL == 0 and game_state.npcs:
+            target = min(game_state.npcs, key=lambda npc: (npc.pos - game_state.player_pos).length_squared())
+            # weapons.shoot takes the target in screen coordinates
+            target_x = target.pos.x + game_state.npc_size // 2 - game_state.camera_pos[0]
+            target_y = target.pos.y + game_state.npc_size // 2 - game_state.camera_pos[1]
+            weapon = game_state.current_weapon
+            if weapon.current_ammo == 0:
+                weapon.reload()
+            weapons.shoot(game_state, target_x, target_y, game_state.time_ms())
+
+        return self.dx, self.dy
+
+def state_digest(game_state):
+    """Hash of the simulation state, equal across runs with the same seed"""
+    digest = hashlib.sha256()
+    digest.update(repr((game_state.player_pos, game_state.player_health, game_state.player_armor,
+                        game_state.score, game_state.camera_pos)).encode())
+    for npc in game_state.npcs:
+        digest.update(repr((npc.pos.x, npc.pos.y, npc.health, npc.state)).encode())
+    pool = game_state.projectiles
+    for array in (pool.x, pool.y, pool.vx, pool.vy, pool.owner):
+        digest.update(np.ascontiguousarray(array[:pool.count]).tobytes())
+    return digest.hexdigest()
+
+def run(ticks, seed):
+    """Simulate the given number of ticks, returning a summary dict"""
+    random.seed(seed)
+    game_state = game.GameState(seed)
+    bot = Bot(seed)
+    deaths = 0
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        dx, dy = bot.step(game_state, tick)
+        game.step_simulation(game_state, dx, dy)
+        game_state.ai_jobs.run()  # Once per tick here, as there are no frames
+        if game_state.player_health <= 0:
+            # Keep the soak going instead of ending the game
+            deaths += 1
+            game_state.player_health = 100
+    elapsed = time.perf_counter() - start
+
+    return {
+        'ticks': ticks,
+        'seconds': elapsed,
+        'ticks_per_second': ticks / elapsed if elapsed else float('inf'),
+        'score': game_state.score,
+        'deaths': deaths,
+        'npcs': len(game_state.npcs),
+        'projectiles': len(game_state.projectiles),
+        'digest': state_digest(game_state),
+        'ai_lod': game_state.ai_lod,
+        'ai_jobs': game_state.ai_jobs,
+        'dormant': len(game_state.population) if game_state.population is not None else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--npc-backend', choices=('objects', 'crowd'), default=config.NPC_BACKEND)
+    parser.add_argument('--max-npcs', type=int, default=config.MAX_NPCS)
+    parser.add_argument('--ai-lod', action='store_true', default=config.AI_LOD,
+                        help="update NPCs away from the view less often (see lod.py)")
+    parser.add_argument('--ai-jobs', action='store_true', default=config.AI_JOBS,
+                        help="queue NPC decisions within a per-tick budget (see jobs.py)")
+    parser.add_argument('--population', type=int, default=config.POPULATION,
+                        help="dormant NPCs kept across the level (see population.py)")
+    args = parser.parse_args()
+
+    config.NPC_BACKEND = args.npc_backend
+    config.MAX_NPCS = args.max_npcs
+    config.AI_LOD = args.ai_lod
+    config.POPULATION = args.population
+    config.AI_JOBS = args.ai_jobs
+    if config.OPEN_WORLD:
+        # Chunks arrive from worker processes in wall-clock order, which is not reproducible
+        print("Warning: OPEN_WORLD is on, results will not be deterministic")
+    if config.AI_JOBS:
+        # How much of the queue fits in the budget depends on the machine
+        print("Warning: AI jobs are on, results may not be deterministic")
+
+    summary = run(args.ticks, args.seed)
+    print(f"{summary['ticks']} ticks in {summary['seconds']:.2f}s ({summary['ticks_per_second']:.0f} ticks/s)")
+    print(f"score {summary['score']}  deaths {summary['deaths']}  "
+          f"npcs {summary['npcs']}  dormant {summary['dormant']}  projectiles {summary['projectiles']}")
+    if summary['ai_lod'] is not None:
+        print(summary['ai_lod'].report())
+    if not summary['ai_jobs'].inline:
+        print(summary['ai_jobs'].report())
+    print(f"digest {summary['digest']}")
+
+if __name__ == "__main__":
+    main()
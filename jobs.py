@@ -0,0 +1,122 @@
+"""Frame-budgeted queue for NPC decisions, turned on with config.AI_JOBS.
+
+NPCs submit their "think" work as small jobs instead of running it inline.
+Each frame, run() works through the queue in priority order until
+AI_JOB_BUDGET_MS is spent, and whatever is left carries over to the next
+frame. A job is a function taking no arguments. If it is a generator
+function, it runs one step (up to its next yield) at a time, so long
+searches can be split across frames.
+
+With AI_JOBS off, submit() runs each job to completion on the spot.
+"""
+import collections
+import heapq
+import itertools
+import time
+import types
+import numpy as np
+import config
+
+PRIORITY_URGENT = 0  # Reactions the player would notice being late, such as alerts
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2  # Planning that can wait a few frames
+LATENCY_HISTORY = 600  # Completed jobs kept for the latency figures
+
+class JobScheduler:
+    def __init__(self, budget_ms=config.AI_JOB_BUDGET_MS, inline=False):
+        self.budget_ms = budget_ms
+        self.inline = inline
+        self.queue = []  # Heap of [priority, order, submit time, job, key]
+        self.order = itertools.count()  # Ties in priority run first-in first-out
+        self.pending = set()  # Keys of queued jobs
+        self.latencies = collections.deque(maxlen=LATENCY_HISTORY)  # Submit to finish, in ms
+        self.completed = 0
+        self.last_ms = 0.0
+        self.last_steps = 0
+        self.frames_over = 0  # Frames where the last step ran past the budget
+
+    def __len__(self):
+        return len(self.queue)
+
+    def submit(self, job, priority=PRIORITY_NORMAL, key=None):
+        """Queue job, unless a job with the same key is still waiting"""
+        if self.inline:
+            result = job()
+            if isinstance(result, types.GeneratorType):
+                for _ in result:
+                    pass
+            return
+        if key is not None:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+        heapq.heappush(self.queue, [priority, next(self.order), time.perf_counter(), job, key])
+
+    def run(self, budget_ms=None):
+        """Run queued jobs in priority order until the budget is spent, returning the ms used.
+
+        A step is only started if one as long as the previous step still fits
+        in the budget. Nothing can cut a step short, so keep steps small.
+        """
+        if budget_ms is None:
+            budget_ms = self.budget_ms
+        start = time.perf_counter()
+        steps = 0
+        step_ms = 0.0
+        while self.queue:
+            step_start = time.perf_counter()
+            if (step_start - start) * 1000 + step_ms >= budget_ms:
+                break
+            entry = heapq.heappop(self.queue)
+            if not isinstance(entry[3], types.GeneratorType):
+                entry[3] = entry[3]()
+            steps += 1
+            if isinstance(entry[3], types.GeneratorType):
+                try:
+                    next(entry[3])
+                except StopIteration:
+                    pass
+                else:
+                    # Unfinished, it goes back ahead of anything queued after it
+                    heapq.heappush(self.queue, entry)
+                    step_ms = (time.perf_counter() - step_start) * 1000
+                    continue
+            self.finish(entry)
+            step_ms = (time.perf_counter() - step_start) * 1000
+
+        self.last_ms = (time.perf_counter() - start) * 1000
+        self.last_steps = steps
+        if self.last_ms > budget_ms:
+            self.frames_over += 1
+        return self.last_ms
+
+    def finish(self, entry):
+        priority, order, submitted, job, key = entry
+        self.pending.discard(key)
+        self.completed += 1
+        self.latencies.append((time.perf_counter() - submitted) * 1000)
+
+    def clear(self):
+        self.queue.clear()
+        self.pending.clear()
+
+    def stats(self):
+        """Queue depth, the last run and job latency, for overlays and logs"""
+        latencies = np.array(self.latencies)
+        return {
+            'depth': len(self.queue),
+            'completed': self.completed,
+            'last_ms': self.last_ms,
+            'last_steps': self.last_steps,
+            'frames_over': self.frames_over,
+            'latency_mean_ms': float(latencies.mean()) if len(latencies) else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            'latency_max_ms': float(latencies.max()) if len(latencies) else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"AI jobs: depth {stats['depth']}  completed {stats['completed']}  "
+                f"frames over budget {stats['frames_over']}\n"
+                f"AI job latency ms: mean {stats['latency_mean_ms']:.2f}  "
+                f"p95 {stats['latency_p95_ms']:.2f}  max {stats['latency_max_ms']:.2f}")
@@ -0,0 +1,65 @@
+"""Level of detail for NPC AI, turned on with config.AI_LOD.
+
+NPCs are put in a tier by how far outside the view they are. Near ones
+update every tick. Mid ones run the full update every AI_LOD_MID_INTERVAL
+ticks, and far ones only move and get despawn checks every
+AI_LOD_FAR_INTERVAL ticks. An NPC that skipped ticks catches up on all of
+them in its next update, and NPCs are offset by their slot so each tick
+handles about the same share of them.
+"""
+import itertools
+import config
+
+NEAR = 0
+MID = 1
+FAR = 2
+TIER_NAMES = ("near", "mid", "far")
+
+# Stagger offsets handed out to NPCs in creation order
+slots = itertools.count()
+
+class LODScheduler:
+    def __init__(self, near=config.AI_LOD_NEAR, mid=config.AI_LOD_MID,
+                 mid_interval=config.AI_LOD_MID_INTERVAL, far_interval=config.AI_LOD_FAR_INTERVAL):
+        self.near = near
+        self.mid = mid
+        self.intervals = (1, mid_interval, far_interval)
+        self.tick = None
+        self.counts = [0, 0, 0]  # NPCs in each tier on the current tick
+        self.updates = [0, 0, 0]  # Updates run in each tier since the last reset
+        self.skipped = 0  # NPC ticks that were caught up on later instead of run
+
+    def reset(self):
+        self.updates = [0, 0, 0]
+        self.skipped = 0
+
+    def tier(self, camera_pos, pos):
+        # Distance outside the view rectangle, along whichever axis is further
+        dx = max(camera_pos[0] - pos.x, pos.x - camera_pos[0] - config.WIDTH, 0)
+        dy = max(camera_pos[1] - pos.y, pos.y - camera_pos[1] - config.HEIGHT, 0)
+        distance = max(dx, dy)
+        if distance <= self.near:
+            return NEAR
+        if distance <= self.mid:
+            return MID
+        return FAR
+
+    def schedule(self, npc, camera_pos, tick):
+        """(tier, ticks to advance npc by) on this tick, 0 ticks when it is not due"""
+        if tick != self.tick:
+            self.tick = tick
+            self.counts = [0, 0, 0]
+        tier = self.tier(camera_pos, npc.pos)
+        self.counts[tier] += 1
+        if (tick + npc.lod_slot) % self.intervals[tier] and npc.lod_tick is not None:
+            self.skipped += 1
+            return tier, 0
+        steps = 1 if npc.lod_tick is None else tick - npc.lod_tick
+        npc.lod_tick = tick
+        self.updates[tier] += 1
+        return tier, steps
+
+    def report(self):
+        counts = "  ".join(f"{name} {count}" for name, count in zip(TIER_NAMES, self.counts))
+        updates = "  ".join(f"{name} {count}" for name, count in zip(TIER_NAMES, self.updates))
+        return f"AI LOD tiers: {counts}\nAI LOD updates: {updates}  skipped {self.skipped}"
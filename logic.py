@@ -1,6 +1,10 @@
 import math
 import config
 
+def ms_to_ticks(ms):
+    """Convert a duration in milliseconds to whole simulation ticks"""
+    return max(1, round(ms * config.TICK_RATE / 1000))
+
 def update_floating_scores(game_state):
     for score in game_state.floating_scores[:]:
         score['time'] -= 1
@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+import numpy as np
+import config
+
+# Bump when the layout of cached files changes. Solver changes that alter
+# maps bump maps.WFC_VERSION instead, which is part of the key
+MAP_FORMAT_VERSION = 1
+
+def cache_key(seed, width, height, tile_types, rules, backtracking, solver_version):
+    """Content hash of everything that decides what a seeded map looks like"""
+    description = {
+        "version": MAP_FORMAT_VERSION,
+        "seed": seed,
+        "size": [width, height],
+        "tile_types": list(tile_types),
+        "rules": {tile_type: {f"{dx},{dy}": sorted(allowed) for (dx, dy), allowed in directions.items()}
+                  for tile_type, directions in rules.items()},
+        "backtracking": backtracking,
+        "solver_version": solver_version,
+    }
+    encoded = json.dumps(description, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def cache_path(key):
+    return os.path.join(config.MAP_CACHE_DIR, f"{key}.npy")
+
+def load_tile_ids(key, width, height):
+    path = cache_path(key)
+    try:
+        tile_ids = np.load(path, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            print(f"Ignoring unreadable map cache {path}: {e}")
+        return None
+    if tile_ids.shape != (height, width):
+        return None
+    return tile_ids
+
+def save_tile_ids(key, tile_ids):
+    path = cache_path(key)
+    try:
+        os.makedirs(config.MAP_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves half a map
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            np.save(file, tile_ids, allow_pickle=False)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not write map cache {path}: {e}")
@@ -1,6 +1,12 @@
 import pygame
 import random
+import heapq
+import time
+from array import array
 import config
+import mapcache
+import numpy as np
+from collections import OrderedDict, deque
 
 TILE_TYPES = {
     'GRASS': (154,205,50),  # Yellow green
@@ -10,161 +16,427 @@ TILE_TYPES = {
     'WATER': (0, 0, 128)  # Navy
 }
 
+# Neighbour offsets in the order used by the compiled WFC rule tables
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Budgets for the backtracking WFC solver
+WFC_MAX_BACKTRACKS = 2000  # Per attempt, before restarting from scratch
+WFC_MAX_RESTARTS = 3  # Before falling back to the permissive solver
+WFC_MAX_TRAIL = 256  # Decisions kept on the undo trail
+
+# Bump when a change to WaveFunctionCollapse alters the map a seed gives,
+# so maps cached by an older solver are generated again
+WFC_VERSION = 2
+
+# The adjacent tiles are placed as follows:
+# (-1, 0): The tile to the left
+# (1, 0): The tile to the right
+# (0, -1): The tile above
+# (0, 1): The tile below
+WFC_RULES = {
+    'GRASS': {
+        (-1, 0): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
+        (1, 0): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
+        (0, -1): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
+        (0, 1): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
+    },
+    'FOREST': {
+        (-1, 0): ['FOREST', 'GRASS'],
+        (1, 0): ['FOREST', 'GRASS'],
+        (0, -1): ['FOREST', 'GRASS'],
+        (0, 1): ['FOREST', 'GRASS'],
+    },
+    'STREET': {
+        (-1, 0): ['STREET', 'PAVEMENT'],
+        (1, 0): ['STREET', 'PAVEMENT'],
+        (0, -1): ['STREET', 'PAVEMENT'],
+        (0, 1): ['STREET', 'PAVEMENT'],
+    },
+    'PAVEMENT': {
+        (-1, 0): ['GRASS', 'STREET', 'PAVEMENT'],
+        (1, 0): ['GRASS', 'STREET', 'PAVEMENT'],
+        (0, -1): ['GRASS', 'STREET', 'PAVEMENT'],
+        (0, 1): ['GRASS', 'STREET', 'PAVEMENT'],
+    },
+    'WATER': {
+        (-1, 0): ['WATER', 'GRASS'],
+        (1, 0): ['WATER', 'GRASS'],
+        (0, -1): ['WATER', 'GRASS'],
+        (0, 1): ['WATER', 'GRASS'],
+    },
+}
+
+CHUNK_TILES = 8  # Terrain chunks are CHUNK_TILES x CHUNK_TILES tiles
+CHUNK_CACHE_SIZE = 32  # Enough for a few viewports' worth of 512x512 chunks
+
+class WFCStats:
+    """Counters and per-phase timings from one WaveFunctionCollapse.generate run"""
+    def __init__(self):
+        self.decisions = 0
+        self.contradictions = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.fell_back = False
+        self.phase_times = {'select': 0.0, 'propagate': 0.0, 'backtrack': 0.0}
+
+    def __repr__(self):
+        times = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.phase_times.items())
+        return (f"WFCStats(decisions={self.decisions}, contradictions={self.contradictions}, "
+                f"backtracks={self.backtracks}, restarts={self.restarts}, "
+                f"fell_back={self.fell_back}, {times})")
+
+class Decision:
+    """One collapse on the undo trail, with the domain changes that followed it"""
+    def __init__(self, i, tile):
+        self.i = i
+        self.tile = tile
+        self.changes = []  # (cell index, old domain, old collapsed tile)
+
 class WaveFunctionCollapse:
-    def __init__(self, tile_types, rules):
+    def __init__(self, tile_types, rules, backtracking=False, max_backtracks=WFC_MAX_BACKTRACKS,
+                 max_restarts=WFC_MAX_RESTARTS, max_trail=WFC_MAX_TRAIL, seed=None):
         self.tile_types = tile_types
         self.rules = rules
         self.grid = None
         self.wave = None
+        self.collapsed = None
+        self.entropy_heap = None
+        self.heap_keys = None  # Latest heap key pushed for each cell
+        self.width = 0
+        self.height = 0
+        # With backtracking, contradictions undo earlier decisions instead
+        # of resetting the cell, so the result never breaks the rules
+        self.backtracking = backtracking
+        self.strict = False
+        self.max_backtracks = max_backtracks
+        self.max_restarts = max_restarts
+        self.trail = deque(maxlen=max_trail)
+        self.stats = WFCStats()
+        # Unseeded runs share the global random module, as before
+        self.rng = random.Random(seed) if seed is not None else random
+        self.compile_rules()
+
+    def compile_rules(self):
+        """Turn the rules dict into per-direction bitmask lookup tables.
+
+        Tile i is bit 1 << i of a domain. support[d][domain] is the mask of
+        tiles allowed in direction DIRECTIONS[d] of a cell holding domain.
+        """
+        index = {tile_type: i for i, tile_type in enumerate(self.tile_types)}
+        self.all_tiles = (1 << len(self.tile_types)) - 1
+        domains = range(self.all_tiles + 1)
+        self.entropy = array('B', [domain.bit_count() for domain in domains])
+
+        self.support = []
+        for direction in DIRECTIONS:
+            allowed = [0] * len(self.tile_types)
+            for tile_type, i in index.items():
+                for neighbour in self.rules[tile_type][direction]:
+                    allowed[i] |= 1 << index[neighbour]
+
+            # Each domain's support is its lowest tile's plus that of the rest
+            table = array('I', [0]) * len(domains)
+            for domain in domains[1:]:
+                lowest = domain & -domain
+                table[domain] = table[domain ^ lowest] | allowed[lowest.bit_length() - 1]
+            self.support.append(table)
 
     def initialize(self, width, height):
-        self.grid = [[None for _ in range(width)] for _ in range(height)]
-        self.wave = [[set(self.tile_types) for _ in range(width)] for _ in range(height)]
+        self.width = width
+        self.height = height
+        self.grid = None
+        self.wave = array('I', [self.all_tiles]) * (width * height)
+        self.collapsed = array('b', [-1]) * (width * height)
+
+        # Heap keys pack (entropy, random tie-breaker, cell index) into one
+        # int. Updates only push, and a popped key that isn't the cell's
+        # latest in heap_keys is stale and skipped.
+        entropy = self.entropy[self.all_tiles] << 52
+        self.entropy_heap = [entropy | (self.rng.getrandbits(20) << 32) | i for i in range(width * height)]
+        self.heap_keys = array('Q', self.entropy_heap)
+        heapq.heapify(self.entropy_heap)
+        self.trail.clear()
+
+    def push_entropy(self, i):
+        key = (self.entropy[self.wave[i]] << 52) | (self.rng.getrandbits(20) << 32) | i
+        self.heap_keys[i] = key
+        heapq.heappush(self.entropy_heap, key)
+
+    def set_domain(self, i, domain, collapsed=-1):
+        if self.trail:
+            self.trail[-1].changes.append((i, self.wave[i], self.collapsed[i]))
+        self.wave[i] = domain
+        self.collapsed[i] = collapsed
+        self.push_entropy(i)
 
     def collapse(self, x, y, tile_type):
-        self.grid[y][x] = tile_type
-        self.wave[y][x] = {tile_type}
-        self.propagate(x, y)
+        i = y * self.width + x
+        tile = self.tile_types.index(tile_type)
+        self.set_domain(i, 1 << tile, tile)
+        return self.propagate(i)
 
-    def propagate(self, x, y):
-        stack = [(x, y)]
+    def propagate(self, i):
+        """Propagate a change at cell i, returns False on a strict-mode contradiction"""
+        start = time.perf_counter()
+        stack = [i]
         while stack:
-            cx, cy = stack.pop()
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            ci = stack.pop()
+            cx, cy = ci % self.width, ci // self.width
+            for d, (dx, dy) in enumerate(DIRECTIONS):
                 nx, ny = cx + dx, cy + dy
-                if 0 <= nx < len(self.grid[0]) and 0 <= ny < len(self.grid):
-                    updated = self.constrain(nx, ny, cx, cy)
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    ni = ny * self.width + nx
+                    updated = self.constrain(ni, ci, d)
+                    if updated is None:
+                        self.stats.contradictions += 1
+                        self.stats.phase_times['propagate'] += time.perf_counter() - start
+                        return False
                     if updated:
-                        stack.append((nx, ny))
+                        stack.append(ni)
+        self.stats.phase_times['propagate'] += time.perf_counter() - start
+        return True
 
-    def constrain(self, x, y, prev_x, prev_y):
-        if self.grid[y][x] is not None:
+    def constrain(self, i, prev, direction):
+        if self.collapsed[i] >= 0:
             return False
-        
-        prev_tile = self.grid[prev_y][prev_x]
-        if prev_tile is None:
+
+        domain = self.wave[i]
+        new_domain = domain & self.support[direction][self.wave[prev]]
+        if new_domain == domain:
             return False
-        
-        direction = (x - prev_x, y - prev_y)
-        allowed = set(self.rules[prev_tile][direction])
-        
-        new_options = self.wave[y][x].intersection(allowed)
-        if not new_options:
-            # If we've constrained ourselves into an impossible situation, 
-            # reset this cell to allow all possibilities
-            new_options = set(self.tile_types)
-        
-        if new_options != self.wave[y][x]:
-            self.wave[y][x] = new_options
-            return True
-        return False
+
+        if not new_domain:
+            if self.strict:
+                return None  # Contradiction, the caller backtracks
+            # If we've constrained ourselves into an impossible situation,
+            # reset this cell to allow all possibilities. Widening a domain
+            # can't constrain the neighbours, so it isn't propagated.
+            self.stats.contradictions += 1
+            self.set_domain(i, self.all_tiles)
+            return False
+
+        self.set_domain(i, new_domain)
+        return True
 
     def get_min_entropy_cell(self):
-        min_entropy = float('inf')
-        candidates = []
-        for y in range(len(self.grid)):
-            for x in range(len(self.grid[0])):
-                if self.grid[y][x] is None:
-                    entropy = len(self.wave[y][x])
-                    if entropy < min_entropy and entropy > 0:
-                        min_entropy = entropy
-                        candidates = [(x, y)]
-                    elif entropy == min_entropy:
-                        candidates.append((x, y))
-        return random.choice(candidates) if candidates else None
-
-    def generate(self, width, height):
-        self.initialize(width, height)
+        # Each open cell has one live key, so the random tie-breaker makes
+        # the winner uniform among the cells that share the lowest entropy
+        start = time.perf_counter()
+        heap = self.entropy_heap
+        cell = None
+        while heap:
+            key = heapq.heappop(heap)
+            i = key & 0xFFFFFFFF
+            if self.collapsed[i] < 0 and self.heap_keys[i] == key:
+                cell = (i % self.width, i // self.width)
+                break
+        self.stats.phase_times['select'] += time.perf_counter() - start
+        return cell
+
+    def choose_tile(self, x, y):
+        domain = self.wave[y * self.width + x]
+        options = [tile_type for i, tile_type in enumerate(self.tile_types) if domain >> i & 1]
+        return self.rng.choice(options)
+
+    def solve(self):
+        """Collapse every cell, resetting cells that hit a contradiction"""
         while True:
             cell = self.get_min_entropy_cell()
             if cell is None:
-                break
+                return True
+            x, y = cell
+            self.stats.decisions += 1
+            self.collapse(x, y, self.choose_tile(x, y))
+
+    def solve_with_backtracking(self):
+        """Collapse every cell, undoing decisions on contradiction. False when over budget"""
+        backtracks = 0
+        while True:
+            cell = self.get_min_entropy_cell()
+            if cell is None:
+                return True
             x, y = cell
-            if not self.wave[y][x]:
-                # If we've constrained a cell to have no possibilities, 
-                # reset it to allow all possibilities
-                self.wave[y][x] = set(self.tile_types)
-            tile_type = random.choice(list(self.wave[y][x]))
-            self.collapse(x, y, tile_type)
+            tile_type = self.choose_tile(x, y)
+            self.stats.decisions += 1
+            self.trail.append(Decision(y * self.width + x, self.tile_types.index(tile_type)))
+            consistent = self.collapse(x, y, tile_type)
+
+            while not consistent:
+                # Decisions that fell off the bounded trail can't be undone
+                if not self.trail or backtracks >= self.max_backtracks:
+                    return False
+                backtracks += 1
+                self.stats.backtracks += 1
+                start = time.perf_counter()
+                decision = self.trail.pop()
+                for i, domain, collapsed in reversed(decision.changes):
+                    self.wave[i] = domain
+                    self.collapsed[i] = collapsed
+                    self.push_entropy(i)
+                self.stats.phase_times['backtrack'] += time.perf_counter() - start
+
+                # Rule out the tile that failed, as part of the previous decision
+                remaining = self.wave[decision.i] & ~(1 << decision.tile)
+                if not remaining:
+                    self.stats.contradictions += 1
+                    continue
+                self.set_domain(decision.i, remaining)
+                consistent = self.propagate(decision.i)
+
+    def apply_fixed(self, fixed):
+        """Collapse the pre-set {(x, y): tile_type} cells, False on a strict-mode contradiction"""
+        for (x, y), tile_type in fixed.items():
+            if not self.collapse(x, y, tile_type):
+                return False
+        return True
+
+    def generate(self, width, height, fixed=None):
+        fixed = fixed or {}
+        self.stats = WFCStats()
+        solved = False
+        if self.backtracking:
+            self.strict = True
+            for attempt in range(self.max_restarts + 1):
+                if attempt:
+                    self.stats.restarts += 1
+                self.initialize(width, height)
+                solved = self.apply_fixed(fixed) and self.solve_with_backtracking()
+                if solved:
+                    break
+            self.strict = False
+            self.trail.clear()
+
+        if not solved:
+            # Out of budget, accept a map that may break the rules
+            self.stats.fell_back = self.backtracking
+            self.initialize(width, height)
+            self.apply_fixed(fixed)
+            self.solve()
+
+        self.grid = [[self.tile_types[self.collapsed[y * width + x]] for x in range(width)]
+                     for y in range(height)]
         return self.grid
+
+    def tile_ids(self):
+        """The collapsed grid as a (height, width) uint8 array of tile_types indices"""
+        return np.frombuffer(self.collapsed, dtype=np.int8).astype(np.uint8).reshape(self.height, self.width)
     
 class Tile:
     def __init__(self, tile_type):
         self.type = tile_type
         self.color = TILE_TYPES[tile_type]
 
+    def draw(self, surface, x, y):
+        pygame.draw.rect(surface, self.color, (x, y, config.TILE_SIZE, config.TILE_SIZE))
+
 class TileMap:
     def __init__(self, width, height):
         self.width = width
         self.height = height
         self.tiles = [[Tile('GRASS') for _ in range(width)] for _ in range(height)]
+        self.terrain = TerrainRenderer(self)
+        self.wfc_stats = None
     
     def get_tile(self, x, y):
         return self.tiles[y][x]
     
     def set_tile(self, x, y, tile_type):
         self.tiles[y][x] = Tile(tile_type)
+        self.terrain.invalidate_tile(x, y)
     
-    def generate_wfc_map(self):
+    def generate_wfc_map(self, backtracking=False, seed=None):
         tile_types = list(TILE_TYPES.keys())
-        # The adjacent tiles are placed as follows:
-        # (-1, 0): The tile to the left
-        # (1, 0): The tile to the right
-        # (0, -1): The tile above
-        # (0, 1): The tile below
-        rules = {
-            'GRASS': {
-                (-1, 0): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
-                (1, 0): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
-                (0, -1): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
-                (0, 1): ['GRASS', 'FOREST', 'WATER', 'PAVEMENT'],
-            },
-            'FOREST': {
-                (-1, 0): ['FOREST', 'GRASS'],
-                (1, 0): ['FOREST', 'GRASS'],
-                (0, -1): ['FOREST', 'GRASS'],
-                (0, 1): ['FOREST', 'GRASS'],
-            },
-            'STREET': {
-                (-1, 0): ['STREET', 'PAVEMENT'],
-                (1, 0): ['STREET', 'PAVEMENT'],
-                (0, -1): ['STREET', 'PAVEMENT'],
-                (0, 1): ['STREET', 'PAVEMENT'],
-            },
-            'PAVEMENT': {
-                (-1, 0): ['GRASS', 'STREET', 'PAVEMENT'],
-                (1, 0): ['GRASS', 'STREET', 'PAVEMENT'],
-                (0, -1): ['GRASS', 'STREET', 'PAVEMENT'],
-                (0, 1): ['GRASS', 'STREET', 'PAVEMENT'],
-            },
-            'WATER': {
-                (-1, 0): ['WATER', 'GRASS'],
-                (1, 0): ['WATER', 'GRASS'],
-                (0, -1): ['WATER', 'GRASS'],
-                (0, 1): ['WATER', 'GRASS'],
-            },
-        }
-        
-        wfc = WaveFunctionCollapse(tile_types, rules)
+
+        # Seeded maps are reproducible, so they can be loaded from the cache
+        if seed is not None:
+            key = mapcache.cache_key(seed, self.width, self.height, tile_types, WFC_RULES, backtracking, WFC_VERSION)
+            tile_ids = mapcache.load_tile_ids(key, self.width, self.height)
+            if tile_ids is not None:
+                self.set_tile_ids(tile_ids, tile_types)
+                return
+
+        wfc = WaveFunctionCollapse(tile_types, WFC_RULES, backtracking, seed=seed)
         generated_map = wfc.generate(self.width, self.height)
+        self.wfc_stats = wfc.stats
         
         for y in range(self.height):
             for x in range(self.width):
                 self.set_tile(x, y, generated_map[y][x])
 
+        if seed is not None:
+            mapcache.save_tile_ids(key, wfc.tile_ids())
+
+    def set_tile_ids(self, tile_ids, tile_types):
+        for y in range(self.height):
+            for x, tile_id in enumerate(tile_ids[y].tolist()):
+                self.set_tile(x, y, tile_types[tile_id])
+
+class TerrainRenderer:
+    """Draws a TileMap from pre-rendered chunk surfaces kept in an LRU cache"""
+    def __init__(self, tilemap, chunk_tiles=CHUNK_TILES, cache_size=CHUNK_CACHE_SIZE):
+        self.tilemap = tilemap
+        self.chunk_tiles = chunk_tiles
+        self.chunk_pixels = chunk_tiles * config.TILE_SIZE
+        self.cache_size = cache_size
+        self.chunks = OrderedDict()
+        self.bakes = 0  # Chunks baked so far, a change means the terrain on screen may have too
+
+    def invalidate_tile(self, x, y):
+        self.chunks.pop((x // self.chunk_tiles, y // self.chunk_tiles), None)
+
+    def invalidate_all(self):
+        self.chunks.clear()
+
+    def bake_chunk(self, chunk_x, chunk_y):
+        start_x = chunk_x * self.chunk_tiles
+        start_y = chunk_y * self.chunk_tiles
+        end_x = min(start_x + self.chunk_tiles, self.tilemap.width)
+        end_y = min(start_y + self.chunk_tiles, self.tilemap.height)
+
+        # Chunks on the right and bottom edges only cover the tiles that exist
+        surface = pygame.Surface(((end_x - start_x) * config.TILE_SIZE, (end_y - start_y) * config.TILE_SIZE))
+        self.bakes += 1
+        for y in range(start_y, end_y):
+            for x in range(start_x, end_x):
+                tile = self.tilemap.get_tile(x, y)
+                tile.draw(surface, (x - start_x) * config.TILE_SIZE, (y - start_y) * config.TILE_SIZE)
+
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # Match the display format for fast blits
+        return surface
+
+    def get_chunk(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.bake_chunk(chunk_x, chunk_y)
+            self.chunks[key] = chunk
+            if len(self.chunks) > self.cache_size:
+                self.chunks.popitem(last=False)  # Evict the least recently used chunk
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def render(self, screen, camera_pos):
+        camera_x = int(camera_pos[0])
+        camera_y = int(camera_pos[1])
+        chunks_x = -(-self.tilemap.width // self.chunk_tiles)
+        chunks_y = -(-self.tilemap.height // self.chunk_tiles)
+
+        start_x = max(0, camera_x // self.chunk_pixels)
+        start_y = max(0, camera_y // self.chunk_pixels)
+        end_x = min(chunks_x, (camera_x + screen.get_width()) // self.chunk_pixels + 1)
+        end_y = min(chunks_y, (camera_y + screen.get_height()) // self.chunk_pixels + 1)
+
+        blits = []
+        for chunk_y in range(start_y, end_y):
+            for chunk_x in range(start_x, end_x):
+                blits.append((self.get_chunk(chunk_x, chunk_y),
+                              (chunk_x * self.chunk_pixels - camera_x, chunk_y * self.chunk_pixels - camera_y)))
+        screen.blits(blits, doreturn=False)
+
 def render_tilemap(screen, tilemap, camera_pos):
-    start_x = int(camera_pos[0]) // config.TILE_SIZE
-    start_y = int(camera_pos[1]) // config.TILE_SIZE
-    end_x = start_x + (screen.get_width() // config.TILE_SIZE) + 2
-    end_y = start_y + (screen.get_height() // config.TILE_SIZE) + 2
-
-    for y in range(start_y, end_y):
-        for x in range(start_x, end_x):
-            if 0 <= x < tilemap.width and 0 <= y < tilemap.height:
-                tile = tilemap.get_tile(x, y)
-                screen_x = x * config.TILE_SIZE - int(camera_pos[0])
-                screen_y = y * config.TILE_SIZE - int(camera_pos[1])
-                pygame.draw.rect(screen, tile.color, (screen_x, screen_y, config.TILE_SIZE, config.TILE_SIZE))
+    tilemap.terrain.render(screen, camera_pos)
 
 class Minimap:
     def __init__(self, screen_width, screen_height, level_width, level_height):
@@ -242,4 +514,4 @@ class Minimap:
 
     def draw(self, screen):
         # Draw the minimap surface onto the main screen
-        screen.blit(self.surface, (self.x, self.y))
\ No newline at end of file
+        return screen.blit(self.surface, (self.x, self.y))
\ No newline at end of file
@@ -7,9 +7,31 @@ import config
 import inputs
 from sounds import sounds
 
-def main_menu():
+class MenuFrames:
+    """Presents a menu frame only when input may have changed it, and keeps
+    the menu loop to config.MENU_FPS passes a second."""
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+        self.pending = 2
+
+    def changed(self):
+        # Loops draw either before or after handling events, so the new state
+        # shows up on this pass or the next one
+        self.pending = 2
+
+    def present(self):
+        if self.pending:
+            pygame.display.update()
+            self.pending -= 1
+
+    def wait(self):
+        self.clock.tick(config.MENU_FPS)
+
+def main_menu(on_first_frame=None):
+    """on_first_frame is called once the menu is on screen, returning True exits"""
+    frames = MenuFrames()
+    high_score = inputs.load_high_score()
     while True:
-        high_score = inputs.load_high_score()
         graphics.screen.fill(config.BLACK)
         graphics.draw_text("Top-Down Shooter", config.WHITE, config.WIDTH // 2, config.HEIGHT // 4)
         graphics.draw_text(f"High Score: {high_score}", config.WHITE, config.WIDTH // 2, config.HEIGHT // 3)
@@ -32,7 +54,10 @@ def main_menu():
         graphics.draw_text("Exit", config.BLACK, config.WIDTH // 2, config.HEIGHT // 2 + 235)
         
         click = False
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            frames.changed()
+        for event in events:
             if event.type == pygame.QUIT:
                 return "exit"
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -52,9 +77,15 @@ def main_menu():
             if click:
                 return "exit"
         
-        pygame.display.update()
+        frames.present()
+        if on_first_frame is not None:
+            if on_first_frame():
+                return "exit"
+            on_first_frame = None
+        frames.wait()
 
 def help_menu():
+    frames = MenuFrames()
     running = True
     while running:
         graphics.screen.fill(config.BLACK)
@@ -65,7 +96,10 @@ def help_menu():
         graphics.draw_text("3 hits to kill an enemy", config.WHITE, config.WIDTH // 2, config.HEIGHT // 2 + 60)
         graphics.draw_text("Press ESC to return to main menu", config.WHITE, config.WIDTH // 2, config.HEIGHT * 3 // 4)
         
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            frames.changed()
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -73,12 +107,14 @@ def help_menu():
                 if event.key == pygame.K_ESCAPE:
                     running = False
         
-        pygame.display.update()
+        frames.present()
+        frames.wait()
 
 def settings_menu():
     controls = load_controls()
     music_volume, sfx_volume = load_volume_settings()
     
+    frames = MenuFrames()
     running = True
     selected_control = None
     
@@ -139,9 +175,13 @@ def settings_menu():
         graphics.draw_text("Press ESC to save and return to main menu", config.WHITE, 
                  config.WIDTH // 2, config.HEIGHT - button_height, graphics.small_font)
         
-        pygame.display.update()
+        frames.present()
+        frames.wait()
         
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            frames.changed()
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -204,6 +244,7 @@ def save_volume_settings(music_volume, sfx_volume):
         json.dump({"music": music_volume, "sfx": sfx_volume}, f)
 
 def pause_menu(game_state):
+    frames = MenuFrames()
     pause_menu_running = True
     while pause_menu_running:
         graphics.screen.fill((0, 0, 0, 128))  # Semi-transparent black
@@ -211,7 +252,10 @@ def pause_menu(game_state):
         graphics.draw_text("Press ESC to resume", config.WHITE, config.WIDTH // 2, config.HEIGHT // 2)
         graphics.draw_text("Press M to return to main menu", config.WHITE, config.WIDTH // 2, config.HEIGHT // 2 + 40)
         
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            frames.changed()
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -221,11 +265,18 @@ def pause_menu(game_state):
                 elif event.key == pygame.K_m:
                     return "main_menu"
         
-        pygame.display.flip()
+        frames.present()
+        frames.wait()
     
     game_state.paused = False
 
 class WeaponWheel:
+    """Weapon picker drawn from surfaces baked once per weapon list.
+
+    The base surface holds every segment unselected, and each segment has a
+    cropped highlight overlay, so a frame is two blits. Both are rebuilt
+    when the weapon list changes.
+    """
     def __init__(self, weapons):
         self.weapons = weapons
         self.active = False
@@ -234,10 +285,16 @@ class WeaponWheel:
         self.wheel_surface = pygame.Surface((400, 400), pygame.SRCALPHA)
         self.center = (200, 200)
         self.radius = 150
-        
+        self.baked_key = None
+        self.highlights = []
+
+    def weapons_key(self):
+        return tuple((id(weapon), weapon.name, weapon.damage, id(weapon.image)) for weapon in self.weapons)
+
+    def scale_images(self):
         # Pre-scale weapon images for the wheel
         self.scaled_images = []
-        for weapon in weapons:
+        for weapon in self.weapons:
             try:
                 scaled_image = pygame.transform.scale(weapon.image, (48, 48))  # Slightly larger icons
                 self.scaled_images.append(scaled_image)
@@ -247,105 +304,130 @@ class WeaponWheel:
                 placeholder.fill((100, 100, 100))  # Gray placeholder instead of magenta
                 self.scaled_images.append(placeholder)
 
-    def draw(self, screen):
-        if not self.active:
-            return
+    def draw_segment(self, surface, i, highlighted):
+        segment_angle = 2 * math.pi / len(self.weapons)
+        start_angle = i * segment_angle - math.pi / 2
+        end_angle = (i + 1) * segment_angle - math.pi / 2
+        weapon = self.weapons[i]
 
-        # Fill with dark background
-        self.wheel_surface.fill((30, 30, 40))  # Dark blue-gray background
+        # Draw segment with gradient effect
+        if highlighted:
+            segment_color = (80, 120, 180)  # Highlighted blue
+            border_color = (100, 160, 255)  # Bright blue border
+        else:
+            segment_color = (60, 60, 70)  # Dark gray
+            border_color = (80, 80, 90)  # Slightly lighter border
 
-        segment_angle = 2 * math.pi / len(self.weapons)
-        
-        # Draw outer circle first
-        pygame.draw.circle(self.wheel_surface, (50, 50, 60), self.center, self.radius + 20)
-        
-        # Draw segments and weapons
-        for i, weapon in enumerate(self.weapons):
-            start_angle = i * segment_angle - math.pi / 2
-            end_angle = (i + 1) * segment_angle - math.pi / 2
-            
-            # Draw segment with gradient effect
-            if i == self.selected:
-                segment_color = (80, 120, 180)  # Highlighted blue
-                border_color = (100, 160, 255)  # Bright blue border
-            else:
-                segment_color = (60, 60, 70)  # Dark gray
-                border_color = (80, 80, 90)  # Slightly lighter border
-            
-            # Draw main segment
-            pygame.draw.arc(self.wheel_surface, segment_color, 
-                          (60, 60, 280, 280), start_angle, end_angle, 80)
-            # Draw border
-            pygame.draw.arc(self.wheel_surface, border_color,
-                          (60, 60, 280, 280), start_angle, end_angle, 2)
-
-            # Calculate positions
-            mid_angle = (start_angle + end_angle) / 2
-            
-            # Draw weapon icon
-            if i < len(self.scaled_images):
-                image = self.scaled_images[i]
-                icon_distance = self.radius * 0.65
-                icon_x = self.center[0] + math.cos(mid_angle) * icon_distance
-                icon_y = self.center[1] + math.sin(mid_angle) * icon_distance
-                
-                # Draw icon background circle
-                pygame.draw.circle(self.wheel_surface, border_color, 
-                                (int(icon_x), int(icon_y)), 30)
-                
-                image_rect = image.get_rect(center=(int(icon_x), int(icon_y)))
-                self.wheel_surface.blit(image, image_rect)
-            
-            # Draw weapon name with better font and shadow
-            font = pygame.font.Font(None, 28)  # Slightly larger font
-            
-            # Draw shadow first
-            name_text_shadow = font.render(weapon.name, True, (0, 0, 0))
-            text_distance = self.radius * 0.35
-            text_x = self.center[0] + math.cos(mid_angle) * text_distance
-            text_y = self.center[1] + math.sin(mid_angle) * text_distance
-            text_rect_shadow = name_text_shadow.get_rect(center=(int(text_x + 2), int(text_y + 2)))
-            self.wheel_surface.blit(name_text_shadow, text_rect_shadow)
-            
-            # Draw actual text
-            name_text = font.render(weapon.name, True, (255, 255, 255))
-            text_rect = name_text.get_rect(center=(int(text_x), int(text_y)))
-            self.wheel_surface.blit(name_text, text_rect)
-            
-            # Draw weapon stats with improved styling
-            stats_text = f"DMG: {weapon.damage}"
-            stats_font = pygame.font.Font(None, 24)
-            stats = stats_font.render(stats_text, True, (180, 180, 200))
-            stats_distance = self.radius * 0.85
-            stats_x = self.center[0] + math.cos(mid_angle) * stats_distance
-            stats_y = self.center[1] + math.sin(mid_angle) * stats_distance
-            stats_rect = stats.get_rect(center=(int(stats_x), int(stats_y)))
-            self.wheel_surface.blit(stats, stats_rect)
-
-        # Draw center hub
+        # Draw main segment
+        pygame.draw.arc(surface, segment_color, 
+                      (60, 60, 280, 280), start_angle, end_angle, 80)
+        # Draw border
+        pygame.draw.arc(surface, border_color,
+                      (60, 60, 280, 280), start_angle, end_angle, 2)
+
+        # Calculate positions
+        mid_angle = (start_angle + end_angle) / 2
+
+        # Draw weapon icon
+        if i < len(self.scaled_images):
+            image = self.scaled_images[i]
+            icon_distance = self.radius * 0.65
+            icon_x = self.center[0] + math.cos(mid_angle) * icon_distance
+            icon_y = self.center[1] + math.sin(mid_angle) * icon_distance
+
+            # Draw icon background circle
+            pygame.draw.circle(surface, border_color, 
+                            (int(icon_x), int(icon_y)), 30)
+
+            image_rect = image.get_rect(center=(int(icon_x), int(icon_y)))
+            surface.blit(image, image_rect)
+
+        # Draw shadow first
+        name_text_shadow = self.name_font.render(weapon.name, True, (0, 0, 0))
+        text_distance = self.radius * 0.35
+        text_x = self.center[0] + math.cos(mid_angle) * text_distance
+        text_y = self.center[1] + math.sin(mid_angle) * text_distance
+        text_rect_shadow = name_text_shadow.get_rect(center=(int(text_x + 2), int(text_y + 2)))
+        surface.blit(name_text_shadow, text_rect_shadow)
+
+        # Draw actual text
+        name_text = self.name_font.render(weapon.name, True, (255, 255, 255))
+        text_rect = name_text.get_rect(center=(int(text_x), int(text_y)))
+        surface.blit(name_text, text_rect)
+
+        # Draw weapon stats with improved styling
+        stats_text = f"DMG: {weapon.damage}"
+        stats = self.stats_font.render(stats_text, True, (180, 180, 200))
+        stats_distance = self.radius * 0.85
+        stats_x = self.center[0] + math.cos(mid_angle) * stats_distance
+        stats_y = self.center[1] + math.sin(mid_angle) * stats_distance
+        stats_rect = stats.get_rect(center=(int(stats_x), int(stats_y)))
+        surface.blit(stats, stats_rect)
+
+    def draw_hub(self, surface, selected):
         hub_radius = 40
-        pygame.draw.circle(self.wheel_surface, (50, 50, 60), self.center, hub_radius)  # Outer circle
-        pygame.draw.circle(self.wheel_surface, (80, 80, 90), self.center, hub_radius - 2)  # Inner circle
-        
+        pygame.draw.circle(surface, (50, 50, 60), self.center, hub_radius)  # Outer circle
+        pygame.draw.circle(surface, (80, 80, 90), self.center, hub_radius - 2)  # Inner circle
+
         # Draw selection indicator
-        if self.selected >= 0:
-            arrow_angle = self.selected * segment_angle - math.pi / 2
+        if selected >= 0:
+            segment_angle = 2 * math.pi / len(self.weapons)
+            arrow_angle = selected * segment_angle - math.pi / 2
             arrow_length = hub_radius - 5
             arrow_end_x = self.center[0] + math.cos(arrow_angle) * arrow_length
             arrow_end_y = self.center[1] + math.sin(arrow_angle) * arrow_length
-            
+
             # Draw arrow with glow effect
-            pygame.draw.line(self.wheel_surface, (100, 160, 255), 
+            pygame.draw.line(surface, (100, 160, 255), 
                            self.center, (arrow_end_x, arrow_end_y), 4)
-            pygame.draw.line(self.wheel_surface, (200, 220, 255), 
+            pygame.draw.line(surface, (200, 220, 255), 
                            self.center, (arrow_end_x, arrow_end_y), 2)
 
+    def bake(self):
+        """Render the unselected wheel and one highlight overlay per segment"""
+        self.name_font = pygame.font.Font(None, 28)  # Slightly larger font
+        self.stats_font = pygame.font.Font(None, 24)
+        self.scale_images()
+
+        # Fill with dark background
+        self.wheel_surface.fill((30, 30, 40))  # Dark blue-gray background
+        # Draw outer circle first
+        pygame.draw.circle(self.wheel_surface, (50, 50, 60), self.center, self.radius + 20)
+        for i in range(len(self.weapons)):
+            self.draw_segment(self.wheel_surface, i, False)
+        self.draw_hub(self.wheel_surface, -1)
+        if pygame.display.get_surface() is not None:
+            self.wheel_surface = self.wheel_surface.convert()
+
+        # Each overlay repaints its segment and the hub, cropped to what it touched
+        self.highlights = []
+        for i in range(len(self.weapons)):
+            overlay = pygame.Surface(self.wheel_surface.get_size(), pygame.SRCALPHA)
+            self.draw_segment(overlay, i, True)
+            self.draw_hub(overlay, i)
+            bounds = overlay.get_bounding_rect()
+            overlay = overlay.subsurface(bounds).copy()
+            if pygame.display.get_surface() is not None:
+                overlay = overlay.convert_alpha()
+            self.highlights.append((overlay, bounds.topleft))
+
+        self.baked_key = self.weapons_key()
+
+    def draw(self, screen):
+        if not self.active:
+            return
+        if self.baked_key != self.weapons_key():
+            self.bake()
+
         # Position the wheel on screen with a slight fade effect around edges
-        screen_pos = (
-            screen.get_width() // 2 - self.wheel_surface.get_width() // 2,
-            screen.get_height() // 2 - self.wheel_surface.get_height() // 2
-        )
-        screen.blit(self.wheel_surface, screen_pos)
+        screen_x = screen.get_width() // 2 - self.wheel_surface.get_width() // 2
+        screen_y = screen.get_height() // 2 - self.wheel_surface.get_height() // 2
+        # The overlays sit inside the wheel, so its rect covers both
+        area = screen.blit(self.wheel_surface, (screen_x, screen_y))
+        if 0 <= self.selected < len(self.highlights):
+            overlay, (x, y) = self.highlights[self.selected]
+            screen.blit(overlay, (screen_x + x, screen_y + y))
+        return area
 
     def handle_mouse(self, mouse_pos):
         if not self.active:
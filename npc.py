@@ -1,21 +1,37 @@
+import numpy as np
 import pygame
 from pygame.math import Vector2
 import random
 import math
+import itertools
 import config
 from sounds import sounds
+import collisions
 import logic
+import jobs
+import lod
+import spatial
 
 NPC_SIZE = 30
-NPC_SPEED = 2
+NPC_SPEED = 2  # Pixels per tick
 NPC_HEALTH = 5
-NPC_SPAWN_RATE = 60
-NPC_BULLET_SPEED = 5
+NPC_SPAWN_RATE = config.TICK_RATE  # Ticks between spawns
+NPC_BULLET_SPEED = 5  # Pixels per tick
 ALERT_RADIUS = 200
 
+GUN_SIZE = 10
+HEALTH_BAR_HEIGHT = 5
+HEALTH_BAR_GAP = 10  # From the top of the health bar to the top of the NPC
+HEALTH_BAR_COLORS = (config.GREEN, config.YELLOW, config.RED)  # Above 60%, above 30%, the rest
+TRANSPARENT = (255, 0, 255)  # Colorkey for the unfilled part of a health bar
+
+# Keys for queued AI jobs, as id() can be reused once an NPC is freed
+ids = itertools.count()
+
 class NPC:
     def __init__(self, x, y, game_state):
         self.pos = Vector2(x, y)
+        self.prev_pos = Vector2(x, y)  # Position at the start of the tick, for interpolated drawing
         self.max_health = NPC_HEALTH
         self.health = self.max_health
         self.bullet_speed = NPC_BULLET_SPEED
@@ -23,35 +39,53 @@ class NPC:
         self.direction = Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize()
         self.rect = pygame.Rect(x, y, game_state.npc_size, game_state.npc_size)
         self.collision_cooldown = 0
-        self.state_timer = random.randint(60, 180)
-        self.has_gun = random.random() < 0.1  # 10% chance to have a gun
+        self.state_timer = random.randint(config.TICK_RATE, 3 * config.TICK_RATE)
+        has_gun = random.random() < 0.1  # 10% chance to have a gun
         self.shoot_cooldown = 0
         self.is_alerted = False
         self.alert_cooldown = 0  # Add cooldown for alert state
         self.game_state = game_state
-        self.weapon = game_state.get_pistol() if self.has_gun else None
-        self.reaction_time = random.randint(30, 90) 
+        self.reaction_time = random.randint(config.TICK_RATE // 2, 3 * config.TICK_RATE // 2)
+        self.npc_id = next(ids)
+        self.live = True  # Cleared by GameState.remove_npc, for jobs still queued after that
+        self.lod_slot = next(lod.slots)
+        self.lod_tick = None  # Tick of the last update under AI LOD
+        self.seed = None  # Set when the NPC comes from a dormant population record
+        self.arm(has_gun)
 
+    def arm(self, has_gun, rng=random):
+        self.has_gun = has_gun
+        self.weapon = self.game_state.get_pistol() if has_gun else None
         if self.weapon:
-            self.actual_fire_rate = int(self.weapon.fire_rate * random.uniform(0.9, 1.1))
+            self.actual_fire_rate = int(self.weapon.fire_rate * rng.uniform(0.9, 1.1))
         else:
             self.actual_fire_rate = 0
 
-    def update(self):
-        self.move()
-        if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
-        if self.alert_cooldown > 0:
-            self.alert_cooldown -= 1
+    def restore(self, health, has_gun, seed):
+        """Give an NPC promoted from a dormant record its health and traits back"""
+        traits = random.Random(seed)
+        self.seed = seed
+        self.health = health
+        self.reaction_time = traits.randint(config.TICK_RATE // 2, 3 * config.TICK_RATE // 2)
+        self.arm(has_gun, traits)
+
+    def update(self, steps=1):
+        """Advance steps ticks, more than one when AI LOD skipped some"""
+        self.move(steps)
+        self.alert_cooldown = max(0, self.alert_cooldown - steps)
         self.rect.x = self.pos.x
         self.rect.y = self.pos.y
         
         # Only shoot if alerted and after reaction time has passed
         if self.is_alerted and self.has_gun and self.alert_cooldown <= 0:
-            self.shoot()
+            self.queue_shot()
+
+    def queue_shot(self):
+        """Aim and maybe shoot through the AI job queue"""
+        self.game_state.ai_jobs.submit(self.shoot, jobs.PRIORITY_NORMAL, ("shoot", self.npc_id))
 
     def shoot(self):
-        if self.weapon and self.shoot_cooldown <= 0:
+        if self.live and self.weapon and self.shoot_cooldown <= 0:
             # Calculate distance to player
             distance = (Vector2(self.game_state.player_pos) - self.pos).length()
             
@@ -72,7 +106,7 @@ class NPC:
                     self.weapon.damage
                 )
                 sounds.play_sound(self.weapon.sound)
-                self.shoot_cooldown = self.weapon.fire_rate
+                self.shoot_cooldown = logic.ms_to_ticks(self.actual_fire_rate)
     
     def take_damage(self, amount):
         self.health -= amount
@@ -83,9 +117,11 @@ class NPC:
         if not self.is_alerted:
             self.is_alerted = True
             self.alert_cooldown = self.reaction_time
-            self.alert_nearby_npcs()
+            self.game_state.ai_jobs.submit(self.alert_nearby_npcs, jobs.PRIORITY_URGENT, ("alert", self.npc_id))
 
     def alert_nearby_npcs(self):
+        if not self.live:
+            return
         for npc in self.game_state.npcs:
             if npc != self and npc.has_gun and not npc.is_alerted:
                 distance = self.pos.distance_to(npc.pos)
@@ -93,9 +129,9 @@ class NPC:
                     npc.is_alerted = True
                     npc.alert_cooldown = npc.reaction_time  # Give each NPC their own reaction time
 
-    def move(self):
+    def move(self, steps=1):
         if self.state == "walk":
-            self.pos += self.direction * self.game_state.npc_speed
+            self.pos += self.direction * self.game_state.npc_speed * steps
         elif self.state == "idle":
             pass  # Do nothing when idle
 
@@ -103,14 +139,11 @@ class NPC:
         self.pos.x = max(0, min(self.pos.x, config.LEVEL_WIDTH - self.game_state.npc_size))
         self.pos.y = max(0, min(self.pos.y, config.LEVEL_HEIGHT - self.game_state.npc_size))
 
-        if self.collision_cooldown > 0:
-            self.collision_cooldown -= 1
-
-        if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+        self.collision_cooldown = max(0, self.collision_cooldown - steps)
+        self.shoot_cooldown = max(0, self.shoot_cooldown - steps)
 
         # Update state timer and change state if needed
-        self.state_timer -= 1
+        self.state_timer -= steps
         if self.state_timer <= 0:
             self.change_state()
 
@@ -118,55 +151,20 @@ class NPC:
         if self.state == "walk":
             if random.random() < 0.3:  # 30% chance to stop
                 self.state = "idle"
-                self.state_timer = random.randint(30, 90)  # Idle for 0.5-1.5 seconds
+                self.state_timer = random.randint(config.TICK_RATE // 2, 3 * config.TICK_RATE // 2)  # Idle for 0.5-1.5 seconds
             else:
                 # Change direction
                 self.direction = Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize()
-                self.state_timer = random.randint(60, 180)  # Walk for 1-3 seconds
+                self.state_timer = random.randint(config.TICK_RATE, 3 * config.TICK_RATE)  # Walk for 1-3 seconds
         else:  # If idle, start walking again
             self.state = "walk"
             self.direction = Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize()
-            self.state_timer = random.randint(60, 180)  # Walk for 1-3 seconds
-
-    def draw(self, screen, camera_pos):
-        screen_pos = (
-            self.pos.x - camera_pos[0],
-            self.pos.y - camera_pos[1]
-        )
-        # Render if the NPC is within or near the viewport
-        if (-self.game_state.npc_size <= screen_pos[0] < config.WIDTH + self.game_state.npc_size and
-            -self.game_state.npc_size <= screen_pos[1] < config.HEIGHT + self.game_state.npc_size):
-            pygame.draw.rect(screen, config.RED, 
-                             (screen_pos[0], screen_pos[1], 
-                              self.game_state.npc_size, self.game_state.npc_size))
-            if self.has_gun:
-                gun_size = 10
-                pygame.draw.rect(screen, config.YELLOW, 
-                                 (screen_pos[0] + self.game_state.npc_size - gun_size, 
-                                  screen_pos[1], gun_size, gun_size))
-            self.draw_health_bar(screen, camera_pos)
-
-    def draw_health_bar(self, screen, camera_pos):
-        bar_width = self.game_state.npc_size
-        bar_height = 5
-        fill = (self.health / self.max_health) * bar_width
-        screen_pos = (self.pos.x - camera_pos[0], self.pos.y - camera_pos[1])
-        
-        # Render if the NPC is within or near the viewport
-        if (-self.game_state.npc_size <= screen_pos[0] < config.WIDTH + self.game_state.npc_size and
-            -self.game_state.npc_size <= screen_pos[1] < config.HEIGHT + self.game_state.npc_size):
-            outline_rect = pygame.Rect(int(screen_pos[0]), int(screen_pos[1]) - 10, bar_width, bar_height)
-            fill_rect = pygame.Rect(int(screen_pos[0]), int(screen_pos[1]) - 10, fill, bar_height)
-
-            if self.health > self.max_health * 0.6:
-                color = config.GREEN
-            elif self.health > self.max_health * 0.3:
-                color = config.YELLOW
-            else:
-                color = config.RED
+            self.state_timer = random.randint(config.TICK_RATE, 3 * config.TICK_RATE)  # Walk for 1-3 seconds
 
-            pygame.draw.rect(screen, color, fill_rect)
-            pygame.draw.rect(screen, config.WHITE, outline_rect, 1)
+    def draw(self, screen, camera_pos, alpha=1.0):
+        """Draw just this NPC, returning the area drawn or None when it is off screen"""
+        rects = self.game_state.npc_renderer.draw(screen, render_columns([self]), camera_pos, alpha)
+        return rects[0].unionall(rects[1:]) if rects else None
 
     def hit(self, damage=1):    
         if random.random() < 0.1:  # 10% chance of critical hit
@@ -176,6 +174,11 @@ class NPC:
         
         if self.health > 0:
             sounds.play_sound("pain")
+            self.game_state.ai_jobs.submit(self.react_to_hit, jobs.PRIORITY_URGENT, ("react", self.npc_id))
+
+    def react_to_hit(self):
+        """Pick how to respond to a hit: shoot back, flee or keep walking"""
+        if self.live:
             rand = random.random()
             if rand < 0.1:
                 self.behavior = "shoot"
@@ -186,19 +189,45 @@ class NPC:
                 self.behavior = "walk"
 
 def update_npcs(game_state):
+    if game_state.crowd is not None:
+        game_state.crowd.step(game_state)
+        active = None
+    else:
+        active = step_npcs(game_state)
+
+    collisions.resolve_bullet_hits(game_state)
+
+    # Check for collisions with other NPCs
+    separate_npcs(game_state, active)
+
+def step_npcs(game_state):
+    """Update the NPCs, returning the ones that get collision checks this tick"""
+    scheduler = game_state.ai_lod
+    active = []
     for npc in game_state.npcs[:]:
-        npc.update()
+        tier, steps = lod.NEAR, 1
+        if scheduler is not None:
+            tier, steps = scheduler.schedule(npc, game_state.camera_pos, game_state.ticks)
+            if not steps:
+                continue
+        if tier == lod.FAR:
+            npc.move(steps)
+        else:
+            npc.update(steps)
 
         screen_pos = (npc.pos.x - game_state.camera_pos[0], 
                       npc.pos.y - game_state.camera_pos[1])
         if (screen_pos[0] < -config.WIDTH or screen_pos[0] > config.WIDTH*2 or 
             screen_pos[1] < -config.HEIGHT or screen_pos[1] > config.HEIGHT*2):
-            game_state.remove_npc(npc)
+            game_state.despawn_npc(npc)
             continue
+        if tier == lod.FAR:
+            continue
+        active.append(npc)
 
         # Allow NPCs with guns to shoot periodically CHECK THIS
         if npc.has_gun and npc.shoot_cooldown <= 0:
-            npc.shoot()
+            npc.queue_shot()
 
         # Check for collisions with player
         player_rect = pygame.Rect(game_state.player_pos[0] - game_state.player_size // 2,
@@ -212,48 +241,81 @@ def update_npcs(game_state):
             if direction.length() > 0:
                 direction = direction.normalize()
                 npc.pos += direction * game_state.npc_speed
-        
-        # Check for collisions with bullets
-        for bullet in game_state.bullets[:]:
-            if (npc.pos.x < bullet[0] < npc.pos.x + game_state.npc_size and
-                npc.pos.y < bullet[1] < npc.pos.y + game_state.npc_size):
-                npc.hit(bullet[4])
-                game_state.remove_bullet(bullet)
-                if npc.health <= 0:
-                    # Calculate distance between player and NPC
-                    dx = npc.pos.x - game_state.player_pos[0]
-                    dy = npc.pos.y - game_state.player_pos[1]
-                    distance = math.sqrt(dx**2 + dy**2)
-                    score = logic.calculate_score(distance, game_state)
-                    game_state.score += score
-                    sounds.play_sound("dead")
-                    game_state.add_floating_score(score, npc.pos)
-                    game_state.remove_npc(npc)
-                break
-
-        # Check for collisions with other NPCs
-        for other in game_state.npcs:
-            if npc != other and npc.collision_cooldown == 0 and other.collision_cooldown == 0:
-                distance = npc.pos.distance_to(other.pos)
-                if distance < game_state.npc_size:
-                    # Collision detected, change directions
-                    if distance > 0:
-                        npc.direction = (npc.pos - other.pos).normalize()
-                        other.direction = -npc.direction
-                    else:
-                        # If distance is 0, give them random opposite directions
-                        angle = random.uniform(0, 2 * math.pi)
-                        npc.direction = Vector2(math.cos(angle), math.sin(angle))
-                        other.direction = -npc.direction
-                    
-                    # Move NPCs apart slightly to prevent sticking
-                    separation = (npc.direction * (game_state.npc_size - distance + 1)) / 2
-                    npc.pos += separation
-                    other.pos -= separation
-                    
-                    # Immediately change state after collision
-                    npc.change_state()
-                    other.change_state()
+
+    # None means all of them, as they stand after this tick's bullet hits
+    return active if scheduler is not None else None
+
+def separate_npcs(game_state, npcs=None):
+    """Push apart every pair of NPCs that overlap, at least one of them in npcs.
+
+    All pairs are found and resolved at once from the positions at the start
+    of the pass, so an NPC touching several others gets the sum of the pushes.
+    """
+    everyone = game_state.npcs
+    crowd = game_state.crowd
+    if crowd is not None:
+        n = crowd.count
+        x, y = crowd.x[:n], crowd.y[:n]
+        ready = crowd.collision_cooldown[:n] == 0
+    else:
+        x = np.array([npc.pos.x for npc in everyone], dtype=np.float64)
+        y = np.array([npc.pos.y for npc in everyone], dtype=np.float64)
+        ready = np.array([npc.collision_cooldown == 0 for npc in everyone], dtype=bool)
+    first, second = spatial.close_pairs(x, y, game_state.npc_size)
+    keep = ready[first] & ready[second]
+    if npcs is not None:
+        checked = set(map(id, npcs))
+        active = np.array([id(npc) in checked for npc in everyone], dtype=bool)
+        keep &= active[first] | active[second]
+    first, second = first[keep], second[keep]
+    if not len(first):
+        return
+
+    # Collision detected, the first NPC of a pair heads away from the second
+    dx = x[first] - x[second]
+    dy = y[first] - y[second]
+    distance = np.hypot(dx, dy)
+    stacked = distance == 0
+    distance[stacked] = 1
+    dx /= distance
+    dy /= distance
+    distance[stacked] = 0
+    if stacked.any():
+        # If distance is 0, give them random opposite directions
+        count = int(stacked.sum())
+        if crowd is not None:
+            angles = crowd.rng.uniform(0, 2 * math.pi, count)
+        else:
+            angles = np.array([random.uniform(0, 2 * math.pi) for _ in range(count)])
+        dx[stacked] = np.cos(angles)
+        dy[stacked] = np.sin(angles)
+
+    # Move NPCs apart slightly to prevent sticking
+    push = (game_state.npc_size - distance + 1) / 2
+    shift_x = np.zeros(len(x))
+    shift_y = np.zeros(len(y))
+    np.add.at(shift_x, first, dx * push)
+    np.add.at(shift_x, second, -dx * push)
+    np.add.at(shift_y, first, dy * push)
+    np.add.at(shift_y, second, -dy * push)
+    moved = np.unique(np.concatenate((first, second)))
+
+    # Immediately change state after collision
+    if crowd is not None:
+        x += shift_x
+        y += shift_y
+        crowd.dir_x[first], crowd.dir_y[first] = dx, dy
+        crowd.dir_x[second], crowd.dir_y[second] = -dx, -dy
+        crowd.change_states(moved)
+        return
+    for i, j, ux, uy in zip(first.tolist(), second.tolist(), dx.tolist(), dy.tolist()):
+        everyone[i].direction = Vector2(ux, uy)
+        everyone[j].direction = Vector2(-ux, -uy)
+    new_x = (x + shift_x)[moved].tolist()
+    new_y = (y + shift_y)[moved].tolist()
+    for i, new_pos in zip(moved.tolist(), zip(new_x, new_y)):
+        everyone[i].pos.update(new_pos)
+        everyone[i].change_state()
 
 def spawn_npc(game_state):
     if len(game_state.npcs) < config.MAX_NPCS:
@@ -292,7 +354,10 @@ def spawn_npc(game_state):
         x = max(game_state.npc_size // 2, min(x, config.LEVEL_WIDTH - game_state.npc_size // 2))
         y = max(game_state.npc_size // 2, min(y, config.LEVEL_HEIGHT - game_state.npc_size // 2))
         
-        new_npc = NPC(x, y, game_state)
+        if game_state.crowd is not None:
+            new_npc = game_state.crowd.spawn(x, y, game_state)
+        else:
+            new_npc = NPC(x, y, game_state)
         game_state.add_npc(new_npc)
 
 def check_player_collision(game_state):
@@ -307,12 +372,77 @@ def check_player_collision(game_state):
             
             # Move NPC away from player
             push_strength = max(game_state.npc_size, game_state.player_size)
-            npc.pos.x += direction.x * push_strength
-            npc.pos.y += direction.y * push_strength
+            npc.pos += direction * push_strength
             
             # Change NPC direction
             npc.direction = direction  # Move away from player
             npc.change_state()  # Immediately change state after collision
 
             return False
-    return False
\ No newline at end of file
+    return False
+
+def render_columns(npcs):
+    """Arrays of (prev_x, prev_y, x, y, has_gun, health, max_health) for NPCRenderer.draw"""
+    rows = np.array([(npc.prev_pos.x, npc.prev_pos.y, npc.pos.x, npc.pos.y,
+                      npc.has_gun, npc.health, npc.max_health) for npc in npcs], dtype=np.float64)
+    prev_x, prev_y, x, y, has_gun, health, max_health = rows.reshape(-1, 7).T
+    return prev_x, prev_y, x, y, has_gun.astype(bool), health, max_health
+
+class NPCRenderer:
+    """Draws NPCs from pre-baked surfaces with a single Surface.blits call.
+
+    Bodies come in an unarmed and an armed variant, and there is a health
+    bar for every filled width and colour, so drawing never renders shapes.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.bodies = [self.bake_body(False), self.bake_body(True)]
+        # Indexed by fill * 3 + colour level, fill being whole pixels of bar
+        self.bars = [self.bake_bar(fill, level) for fill in range(size + 1) for level in range(3)]
+
+    def bake_body(self, has_gun):
+        surface = pygame.Surface((self.size, self.size))
+        surface.fill(config.RED)
+        if has_gun:
+            surface.fill(config.YELLOW, (self.size - GUN_SIZE, 0, GUN_SIZE, GUN_SIZE))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def bake_bar(self, fill, level):
+        surface = pygame.Surface((self.size, HEALTH_BAR_HEIGHT))
+        surface.fill(TRANSPARENT)
+        surface.fill(HEALTH_BAR_COLORS[level], (0, 0, fill, HEALTH_BAR_HEIGHT))
+        pygame.draw.rect(surface, config.WHITE, surface.get_rect(), 1)
+        surface.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def draw(self, screen, columns, camera_pos, alpha=1.0):
+        """Draw the NPCs in columns that are within or near the viewport,
+        alpha of the way through the current tick. Returns the rects drawn.
+
+        columns is what render_columns or NPCCrowd.render_columns returns,
+        max_health may be a single number.
+        """
+        prev_x, prev_y, x, y, has_gun, health, max_health = columns
+        screen_x = prev_x + (x - prev_x) * alpha - camera_pos[0]
+        screen_y = prev_y + (y - prev_y) * alpha - camera_pos[1]
+        visible = ((-self.size <= screen_x) & (screen_x < config.WIDTH + self.size) &
+                   (-self.size <= screen_y) & (screen_y < config.HEIGHT + self.size))
+        if not visible.any():
+            return []
+
+        fills = np.clip((health / max_health * self.size).astype(np.int64), 0, self.size)
+        levels = np.where(health > max_health * 0.6, 0, np.where(health > max_health * 0.3, 1, 2))
+        bar_keys = (fills * 3 + levels)[visible].tolist()
+        lefts = screen_x[visible].astype(np.int64).tolist()
+        tops = screen_y[visible].astype(np.int64).tolist()
+        bodies = self.bodies
+        bars = self.bars
+        blits = []
+        for left, top, gun, bar in zip(lefts, tops, has_gun[visible].tolist(), bar_keys):
+            blits.append((bodies[gun], (left, top)))
+            blits.append((bars[bar], (left, top - HEALTH_BAR_GAP)))
+        return screen.blits(blits)
@@ -0,0 +1,81 @@
+"""Persistent NPC population, turned on by setting config.POPULATION.
+
+Every NPC in the level exists all the time, but only the ones near the view
+are live NPC objects. The rest are dormant records in one NumPy structured
+array. A live NPC that strays past the despawn distance is demoted to a
+record instead of deleted, and records that come within POPULATION_MARGIN
+of the view are promoted back, in place of random spawning. The record's
+seed gives the NPC the same reaction time and fire rate every time.
+"""
+import numpy as np
+import config
+import npc
+
+RECORD = np.dtype([
+    ("x", np.float32),
+    ("y", np.float32),
+    ("health", np.float32),
+    ("has_gun", np.bool_),
+    ("seed", np.uint32),
+])
+
+class Population:
+    def __init__(self, seed=None, capacity=1024):
+        self.rng = np.random.default_rng(seed)
+        self.records = np.zeros(capacity, RECORD)
+        self.count = 0  # Dormant NPCs occupy [0, count)
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, count):
+        if count > len(self.records):
+            records = np.zeros(max(count, len(self.records) * 2), RECORD)
+            records[:self.count] = self.records[:self.count]
+            self.records = records
+
+    def populate(self, size, npc_size):
+        """Scatter size dormant NPCs over the level"""
+        self.reserve(self.count + size)
+        new = self.records[self.count:self.count + size]
+        new["x"] = self.rng.uniform(0, config.LEVEL_WIDTH - npc_size, size)
+        new["y"] = self.rng.uniform(0, config.LEVEL_HEIGHT - npc_size, size)
+        new["health"] = npc.NPC_HEALTH
+        new["has_gun"] = self.rng.random(size) < 0.1  # 10% chance to have a gun, as in NPC
+        new["seed"] = self.rng.integers(0, 2**32, size, dtype=np.uint32)
+        self.count += size
+
+    def demote(self, live_npc):
+        """Keep a live NPC as a dormant record. The caller removes it from the game"""
+        self.reserve(self.count + 1)
+        seed = live_npc.seed if live_npc.seed is not None else self.rng.integers(0, 2**32)
+        self.records[self.count] = (live_npc.pos.x, live_npc.pos.y, live_npc.health, live_npc.has_gun, seed)
+        self.count += 1
+
+    def promote(self, game_state):
+        """Bring records near the view back to life, up to POPULATION_MAX_LIVE live NPCs"""
+        room = config.POPULATION_MAX_LIVE - len(game_state.npcs)
+        if room <= 0 or not self.count:
+            return
+        records = self.records[:self.count]
+        margin = config.POPULATION_MARGIN
+        left = game_state.camera_pos[0] - margin
+        top = game_state.camera_pos[1] - margin
+        near = np.flatnonzero((records["x"] >= left) & (records["x"] < left + config.WIDTH + margin * 2) &
+                              (records["y"] >= top) & (records["y"] < top + config.HEIGHT + margin * 2))[:room]
+        if not len(near):
+            return
+
+        for record in records[near].tolist():
+            x, y, health, has_gun, seed = record
+            if game_state.crowd is not None:
+                new_npc = game_state.crowd.spawn(x, y, game_state)
+            else:
+                new_npc = npc.NPC(x, y, game_state)
+            new_npc.restore(health, has_gun, seed)
+            game_state.add_npc(new_npc)
+
+        # Fill the holes from the end, highest index first so each move stays valid
+        for i in near[::-1].tolist():
+            self.count -= 1
+            self.records[i] = self.records[self.count]
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import time
+import numpy as np
+import pygame
+import config
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(PROJECT_ROOT, "profiles")
+
+# Phases of the game() loop, in the order they run each frame
+PHASES = [
+    "events", "move_player", "bullets", "npcs", "spawning", "ai",
+    "tilemap", "minimap", "player_draw", "npc_draw", "bullet_draw", "hud", "overlay", "flip",
+]
+FRAME_HISTORY = 600  # Frames kept in the ring buffer, 10 seconds at 60 FPS
+HISTOGRAM_EDGES_MS = [0, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16.7, 33.3, 100, float("inf")]
+OVERLAY_REFRESH = 15  # Frames between re-renders of the overlay text
+OVERLAY_COLOR = (0, 0, 0, 170)
+OVERLAY_FONT_SIZE = 16
+
+class FrameProfiler:
+    """Records how long each phase of the frame takes in a ring buffer.
+
+    Call begin_frame() at the top of the loop, mark(phase) after each phase
+    (the time since the previous mark is charged to it) and end_frame() last.
+    While disabled every call returns straight away.
+    """
+    def __init__(self, phases=PHASES, history=FRAME_HISTORY):
+        self.phases = list(phases)
+        self.columns = {phase: i for i, phase in enumerate(self.phases)}
+        self.samples = np.zeros((history, len(self.phases)))
+        self.history = history
+        self.frame = 0  # Frames recorded since the last reset
+        self.enabled = False
+        self.last = 0.0
+        self.overlay = None
+        self.font = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.reset()
+            # Toggled mid-frame, after begin_frame returned early, so start timing from here
+            self.last = time.perf_counter()
+
+    def reset(self):
+        self.samples[:] = 0
+        self.frame = 0
+        self.overlay = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.samples[self.frame % self.history] = 0
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        # += so a phase split across the frame adds up
+        self.samples[self.frame % self.history, self.columns[phase]] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.frame += 1
+
+    def recorded(self):
+        """The recorded frames in order, oldest first, as a (frames, phases) array in ms"""
+        if self.frame <= self.history:
+            return self.samples[:self.frame]
+        start = self.frame % self.history
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def summary(self):
+        """Mean, p95 and p99 in ms for each phase and for the whole frame"""
+        frames = self.recorded()
+        if not len(frames):
+            return {}
+        columns = dict(zip(self.phases, frames.T))
+        columns["frame"] = frames.sum(axis=1)
+        return {
+            name: {
+                'mean_ms': float(values.mean()),
+                'p95_ms': float(np.percentile(values, 95)),
+                'p99_ms': float(np.percentile(values, 99)),
+                'histogram': np.histogram(values, HISTOGRAM_EDGES_MS)[0].tolist(),
+            }
+            for name, values in columns.items()
+        }
+
+    def dump(self, directory=PROFILE_DIR):
+        """Write the recorded frames to CSV and the summary to JSON, returning the CSV path"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime("frames-%Y%m%d-%H%M%S"))
+        with open(base + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.phases)
+            writer.writerows(np.round(self.recorded(), 4).tolist())
+        with open(base + ".json", "w") as f:
+            json.dump({
+                'frames': min(self.frame, self.history),
+                'histogram_edges_ms': HISTOGRAM_EDGES_MS[:-1] + ["inf"],
+                'phases': self.summary(),
+            }, f, indent=2)
+        return base + ".csv"
+
+    def draw_overlay(self, screen):
+        if not self.enabled:
+            return
+        # Rendering a dozen lines of text every frame would show up in the numbers
+        if self.overlay is None or self.frame % OVERLAY_REFRESH == 0:
+            self.overlay = self.render_overlay()
+        if self.overlay is not None:
+            return screen.blit(self.overlay, (10, 10))
+
+    def render_overlay(self):
+        summary = self.summary()
+        if not summary:
+            return None
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", OVERLAY_FONT_SIZE)
+        font = self.font
+        lines = [f"{'phase':<12}{'ms':>7}{'p95':>7}{'p99':>7}"]
+        for name in self.phases + ["frame"]:
+            stats = summary[name]
+            lines.append(f"{name:<12}{stats['mean_ms']:>7.2f}{stats['p95_ms']:>7.2f}{stats['p99_ms']:>7.2f}")
+
+        line_height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 10
+        surface = pygame.Surface((width, line_height * len(lines) + 10), pygame.SRCALPHA)
+        surface.fill(OVERLAY_COLOR)
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, config.WHITE), (5, 5 + i * line_height))
+        return surface
+
+profiler = FrameProfiler()
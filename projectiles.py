@@ -0,0 +1,82 @@
+import numpy as np
+
+MAX_PROJECTILES = 16384
+
+OWNER_PLAYER = 0
+OWNER_NPC = 1
+
+class ProjectilePool:
+    """Fixed-capacity struct-of-arrays store for every bullet in flight.
+
+    Live projectiles are kept packed in [0, count) in firing order, so the
+    per-tick work runs on plain array slices. Hit resolution relies on that
+    order, which is why freed slots are compacted rather than swap-removed.
+    """
+    def __init__(self, capacity=MAX_PROJECTILES):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y, vx, vy, damage, owner):
+        if self.count >= self.capacity:
+            return False  # Pool is full, drop the shot
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.damage[i] = damage
+        self.owner[i] = owner
+        self.alive[i] = True
+        self.count += 1
+        return True
+
+    def clear(self):
+        self.alive[:self.count] = False
+        self.count = 0
+
+    def live(self, owner=None):
+        """Indices of live projectiles in firing order, optionally for one owner"""
+        n = self.count
+        mask = self.alive[:n]
+        if owner is not None:
+            mask = mask & (self.owner[:n] == owner)
+        return np.flatnonzero(mask)
+
+    def kill(self, indices):
+        self.alive[indices] = False
+
+    def step(self):
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+
+    def cull(self, min_x, min_y, max_x, max_y, owner):
+        """Kill projectiles of the given owner that left the bounds"""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        outside = (x < min_x) | (x > max_x) | (y < min_y) | (y > max_y)
+        self.alive[:n] &= ~(outside & (self.owner[:n] == owner))
+
+    def compact(self):
+        """Pack the live projectiles to the front of the arrays, keeping their order"""
+        n = self.count
+        keep = np.flatnonzero(self.alive[:n])
+        m = len(keep)
+        if m == n:
+            return
+        for array in (self.x, self.y, self.vx, self.vy, self.damage, self.owner):
+            array[:m] = array[keep]
+        self.alive[:m] = True
+        self.alive[m:n] = False
+        self.count = m
@@ -1,22 +1,51 @@
 import pygame
 import os
+from assets import loader
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
+MUSIC_FILE = "sounds/ambient.ogg"
+sound_files = {
+    "pain": "sounds/pain.wav",
+    "dead": "sounds/dead.wav",
+    "switch": "sounds/switch.wav"
+}
+
 class SoundManager:
+    """Starts the mixer and loads audio on first use, so menus and tools
+    that never play a sound don't pay for decoding it."""
     def __init__(self):
-        pygame.mixer.init()
         self.sounds = {}
         self.music = None
         self.music_volume = 0.5  # Default music volume
         self.sfx_volume = 0.5
+        self.mixer_ready = False
+        self.effects_loaded = False
+
+    def init_mixer(self):
+        if self.mixer_ready:
+            return
+        self.mixer_ready = True
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        self.load_music(MUSIC_FILE)
+
+    def load_effects(self):
+        """Load the gameplay sound effects, the first time it is called"""
+        if self.effects_loaded:
+            return
+        self.effects_loaded = True
+        for sound_name, file_path in sound_files.items():
+            self.load_sound(sound_name, file_path)
 
     def load_sound(self, name, file_path):
+        self.init_mixer()
         abs_path = os.path.join(PROJECT_ROOT, file_path)
         try:
-            sound = pygame.mixer.Sound(abs_path)
+            # Names that point at the same file share one Sound
+            sound = loader.sound(file_path)
             self.sounds[name] = sound
-        except pygame.error as e:
+        except (pygame.error, OSError) as e:
             print(f"Could not load sound {file_path}: {e}")
             print(f"Tried to load from: {abs_path}")
 
@@ -31,24 +60,32 @@ class SoundManager:
     def load_music(self, file_path):
         abs_path = os.path.join(PROJECT_ROOT, file_path)
         try:
-            pygame.mixer.music.load(abs_path)
-        except pygame.error as e:
+            pygame.mixer.music.load(loader.music(file_path))
+        except (pygame.error, OSError) as e:
             print(f"Could not load music {file_path}: {e}")
             print(f"Tried to load from: {abs_path}")
 
     def play_music(self, loops=-1):
+        self.init_mixer()
         pygame.mixer.music.play(loops)
 
     def stop_music(self):
+        if not self.mixer_ready:
+            return  # Nothing is playing yet
         pygame.mixer.music.stop()
 
     def pause_music(self):
+        if not self.mixer_ready:
+            return
         pygame.mixer.music.pause()
 
     def unpause_music(self):
+        if not self.mixer_ready:
+            return
         pygame.mixer.music.unpause()
 
     def set_music_volume(self, volume):
+        self.init_mixer()
         self.music_volume = volume
         pygame.mixer.music.set_volume(volume)
 
@@ -58,16 +95,8 @@ class SoundManager:
             sound.set_volume(volume)
 
     def fade_out_music(self, time):
+        if not self.mixer_ready:
+            return
         pygame.mixer.music.fadeout(time)
 
 sounds = SoundManager()
-sounds.load_music("sounds/ambient.ogg")
-
-sound_files = {
-    "pain": "sounds/pain.wav",
-    "dead": "sounds/dead.wav",
-    "switch": "sounds/switch.wav"
-}
-
-for sound_name, file_path in sound_files.items():
-    sounds.load_sound(sound_name, file_path)
\ No newline at end of file
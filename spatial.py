@@ -0,0 +1,45 @@
+import numpy as np
+
+CELL_STRIDE = 1 << 20  # Row stride for packing (cell_x, cell_y) into one key
+# Cells to pair each cell with, so every neighbouring pair of cells comes up once
+HALF_NEIGHBOURHOOD = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+def bucket(x, y, cell_size):
+    """Pack each point's (cell_x, cell_y) into one key, returning the keys and the stable order sorting them"""
+    cells_x = np.floor_divide(x, cell_size).astype(np.int64)
+    cells_y = np.floor_divide(y, cell_size).astype(np.int64)
+    keys = cells_y * CELL_STRIDE + cells_x
+    return keys, np.argsort(keys, kind="stable")
+
+def close_pairs(x, y, distance):
+    """Index arrays (i, j), i < j, of the points in x, y closer than distance.
+
+    Points are bucketed into cells of size distance by sorting their cell
+    keys, then only neighbouring cells are compared.
+    """
+    n = len(x)
+    keys, order = bucket(x, y, distance)
+    sorted_keys = keys[order]
+    points = np.arange(n)
+
+    firsts, seconds = [], []
+    for dx, dy in ((0, 0),) + HALF_NEIGHBOURHOOD:
+        targets = keys + dy * CELL_STRIDE + dx
+        starts = np.searchsorted(sorted_keys, targets, "left")
+        counts = np.searchsorted(sorted_keys, targets, "right") - starts
+        # Every point paired with every slot of its target cell in the sorted order
+        first = np.repeat(points, counts)
+        offsets = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(starts, counts) + offsets]
+        if dx == dy == 0:
+            keep = first < second  # Within a cell, each pair once and no point with itself
+            first, second = first[keep], second[keep]
+        firsts.append(first)
+        seconds.append(second)
+
+    first = np.concatenate(firsts)
+    second = np.concatenate(seconds)
+    close = np.hypot(x[first] - x[second], y[first] - y[second]) < distance
+    first, second = first[close], second[close]
+    swap = first > second
+    return np.where(swap, second, first), np.where(swap, first, second)
@@ -0,0 +1,28 @@
+"""Start-up timing. game.py imports this first, so the clock starts before
+pygame and the game modules load.
+
+    python game.py --profile-startup [results.json]
+
+runs up to the first menu frame, prints the time to each stage and exits.
+"""
+import json
+import time
+
+START = time.perf_counter()
+marks = []
+
+def mark(stage):
+    """Record the time from start-up to the end of this stage, in ms"""
+    marks.append((stage, (time.perf_counter() - START) * 1000))
+
+def report():
+    lines = [f"{'stage':<20}{'ms':>9}{'delta':>9}"]
+    previous = 0.0
+    for stage, ms in marks:
+        lines.append(f"{stage:<20}{ms:>9.1f}{ms - previous:>9.1f}")
+        previous = ms
+    return "\n".join(lines)
+
+def save(path):
+    with open(path, "w") as f:
+        json.dump({stage: ms for stage, ms in marks}, f, indent=2)
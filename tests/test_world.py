@@ -0,0 +1,69 @@
+"""Chunk seams of the streamed open world.
+
+Run from the project root with: python -m pytest tests
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import concurrent.futures
+import random
+import numpy as np
+import pytest
+import config
+import maps
+import world
+
+CHUNKS = 8
+CHUNK_TILES = 16
+JUMPS = 30  # Random camera jumps before the sweep, so chunks arrive in a jumbled order
+
+@pytest.fixture
+def workers():
+    yield
+    if world.workers is not None:
+        world.workers.shutdown()
+        world.workers = None
+
+def stream_everything(tilemap, seed):
+    """Jump the camera around, then sweep it over every chunk, waiting at each stop until nothing is pending"""
+    chunk_pixels = tilemap.chunk_tiles * config.TILE_SIZE
+    rng = random.Random(seed)
+    stops = [(rng.randrange(tilemap.chunks_x), rng.randrange(tilemap.chunks_y)) for _ in range(JUMPS)]
+    stops += [(chunk_x, chunk_y) for chunk_y in range(tilemap.chunks_y) for chunk_x in range(tilemap.chunks_x)]
+    for chunk_x, chunk_y in stops:
+        camera_pos = (chunk_x * chunk_pixels, chunk_y * chunk_pixels)
+        tilemap.stream(camera_pos)
+        while tilemap.pending:
+            concurrent.futures.wait(list(tilemap.pending.values()))
+            tilemap.stream(camera_pos)
+
+    tiles = np.zeros((tilemap.height, tilemap.width), dtype=np.uint8)
+    for chunk_y in range(tilemap.chunks_y):
+        for chunk_x in range(tilemap.chunks_x):
+            ids = tilemap.chunk_ids((chunk_x, chunk_y))
+            assert ids is not None, f"chunk {(chunk_x, chunk_y)} was never generated"
+            tiles[chunk_y * tilemap.chunk_tiles:(chunk_y + 1) * tilemap.chunk_tiles,
+                  chunk_x * tilemap.chunk_tiles:(chunk_x + 1) * tilemap.chunk_tiles] = ids
+    return tiles
+
+def broken_seams(tiles, chunk_tiles, tile_types):
+    """(x, y, direction) of every tile pair across a chunk seam that breaks WFC_RULES"""
+    broken = []
+    height, width = tiles.shape
+    for x in range(chunk_tiles - 1, width - 1, chunk_tiles):
+        for y in range(height):
+            if tile_types[tiles[y, x + 1]] not in maps.WFC_RULES[tile_types[tiles[y, x]]][(1, 0)]:
+                broken.append((x, y, (1, 0)))
+    for y in range(chunk_tiles - 1, height - 1, chunk_tiles):
+        for x in range(width):
+            if tile_types[tiles[y + 1, x]] not in maps.WFC_RULES[tile_types[tiles[y, x]]][(0, 1)]:
+                broken.append((x, y, (0, 1)))
+    return broken
+
+@pytest.mark.parametrize("backtracking", [False, True])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_streamed_seams_follow_rules(workers, seed, backtracking):
+    tilemap = world.StreamingTileMap(CHUNKS, CHUNKS, CHUNK_TILES, seed, backtracking)
+    tiles = stream_everything(tilemap, seed)
+    assert broken_seams(tiles, CHUNK_TILES, tilemap.tile_types) == []
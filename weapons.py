@@ -1,9 +1,12 @@
 import pygame
 import json
+import numpy as np
 import math
 import os
 from sounds import sounds
+from assets import loader
 import config
+from projectiles import OWNER_PLAYER, OWNER_NPC
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
@@ -17,7 +20,7 @@ class Weapon:
         self.reload_time = reload_time
         self.image = image
         self.sound = sound
-        self.last_shot_time = 0
+        self.last_shot_time = -fire_rate  # Simulation time starts at 0, so the first shot is never held back
 
     def can_fire(self, current_time):
         return current_time - self.last_shot_time >= self.fire_rate
@@ -32,8 +35,8 @@ class Weapon:
     def reload(self):
         self.current_ammo = self.ammo_capacity
 
-def shoot(game_state, target_x, target_y):
-    current_time = pygame.time.get_ticks()
+def shoot(game_state, target_x, target_y, current_time):
+    """Fire the current weapon at a screen position, current_time being simulation ms"""
     weapon = game_state.current_weapon
     
     if weapon.can_fire(current_time):
@@ -59,50 +62,20 @@ def shoot(game_state, target_x, target_y):
     return False
 
 def update_bullets(game_state):
-    for bullet in game_state.bullets[:]:
-        bullet[0] += bullet[2]
-        bullet[1] += bullet[3]
-        
-        # Remove bullets that are far outside the visible area
-        if (bullet[0] < game_state.camera_pos[0] - config.WIDTH or
-            bullet[0] > game_state.camera_pos[0] + config.WIDTH * 2 or
-            bullet[1] < game_state.camera_pos[1] - config.HEIGHT or
-            bullet[1] > game_state.camera_pos[1] + config.HEIGHT * 2):
-            game_state.remove_bullet(bullet)
-
-def update_npc_bullets(game_state):
-    for bullet in game_state.npc_bullets[:]:
-        bullet[0] += bullet[2]
-        bullet[1] += bullet[3]
-        
-        # Remove bullets that are outside the level bounds
-        if (bullet[0] < 0 or bullet[0] > config.LEVEL_WIDTH or
-            bullet[1] < 0 or bullet[1] > config.LEVEL_HEIGHT):
-            game_state.npc_bullets.remove(bullet)
-            continue
+    # Hits on the player and NPCs are resolved in collisions.resolve_bullet_hits
+    projectiles = game_state.projectiles
+    projectiles.step()
 
-        bullet_rect = pygame.Rect(bullet[0] - game_state.bullet_size // 2, 
-                                  bullet[1] - game_state.bullet_size // 2,
-                                  game_state.bullet_size, 
-                                  game_state.bullet_size)
-        
-        # Check collision with player
-        if game_state.player_rect.colliderect(bullet_rect):
-            game_state.damage_player(bullet[4])
-            sounds.play_sound("pain")
-            game_state.npc_bullets.remove(bullet)
+    # Remove player bullets that are far outside the visible area
+    projectiles.cull(game_state.camera_pos[0] - config.WIDTH,
+                     game_state.camera_pos[1] - config.HEIGHT,
+                     game_state.camera_pos[0] + config.WIDTH * 2,
+                     game_state.camera_pos[1] + config.HEIGHT * 2,
+                     OWNER_PLAYER)
 
-        # Check collision with NPCs
-        for npc in game_state.npcs:
-            if npc.rect.colliderect(bullet_rect):
-                npc.hit()  # Enemy takes damage
-                if npc.health > 0:
-                    sounds.play_sound("pain")
-                game_state.npc_bullets.remove(bullet)
-                if npc.health <= 0:
-                    game_state.remove_npc(npc)
-                    sounds.play_sound("dead")
-                break  # Stop checking other NPCs for this bullet
+    # Remove NPC bullets that are outside the level bounds
+    projectiles.cull(0, 0, config.LEVEL_WIDTH, config.LEVEL_HEIGHT, OWNER_NPC)
+    projectiles.compact()
 
 def load_weapons(filename):
     # Create absolute path for the JSON file
@@ -122,8 +95,8 @@ def load_weapons(filename):
         try:
             # Create absolute path for the weapon image
             image_path = os.path.join(PROJECT_ROOT, weapon_data['image'])
-            image = pygame.image.load(image_path).convert_alpha()
-        except pygame.error as e:
+            image = loader.image(image_path)
+        except (pygame.error, OSError) as e:
             print(f"Couldn't load image {weapon_data['image']}: {e}")
             print(f"Tried to load from: {image_path}")
             image = pygame.Surface((32, 32))
@@ -147,10 +120,53 @@ def load_weapons(filename):
     
     return weapons
 
-def draw_npc_bullets(screen, game_state):
-    for bullet in game_state.npc_bullets:
-        bullet_screen_pos = (
-            int(bullet[0] - game_state.camera_pos[0]),
-            int(bullet[1] - game_state.camera_pos[1])
-        )
-        pygame.draw.circle(screen, config.BULLET, bullet_screen_pos, game_state.bullet_size)
\ No newline at end of file
+# Bullet colours by projectile owner, each is rendered to a sprite once
+BULLET_COLORS = {
+    OWNER_PLAYER: config.BULLET,
+    OWNER_NPC: config.BULLET,
+}
+BULLET_COLORKEY = (255, 0, 255)
+
+class BulletRenderer:
+    """Draws every projectile in a ProjectilePool with one Surface.blits call,
+    from a circle pre-rendered for each owner."""
+    def __init__(self, radius, colors=BULLET_COLORS):
+        self.radius = radius
+        self.sprites = [None] * (max(colors) + 1)  # Indexed by owner
+        self.offset = (0, 0)
+        for owner, color in colors.items():
+            self.sprites[owner] = self.bake(color)
+
+    def bake(self, color):
+        size = self.radius * 2 + 1
+        surface = pygame.Surface((size, size))
+        surface.fill(BULLET_COLORKEY)
+        pygame.draw.circle(surface, color, (self.radius, self.radius), self.radius)
+        surface.set_colorkey(BULLET_COLORKEY, pygame.RLEACCEL)
+        # Crop to what draw.circle covered, so the sprite lands on the same pixels it did.
+        # Every sprite has the same radius, so they share the offset
+        bounds = surface.get_bounding_rect()
+        self.offset = (bounds.x - self.radius, bounds.y - self.radius)
+        surface = surface.subsurface(bounds).copy()
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def draw(self, screen, projectiles, camera_pos, alpha=1.0):
+        """Draw the projectiles alpha of the way through the current tick,
+        returning the rects drawn. Bullets move in straight lines, so the
+        last tick is just one step back."""
+        n = projectiles.count
+        left = projectiles.x[:n] - projectiles.vx[:n] * (1 - alpha) - camera_pos[0]
+        top = projectiles.y[:n] - projectiles.vy[:n] * (1 - alpha) - camera_pos[1]
+        left = left.astype(np.int64) + self.offset[0]
+        top = top.astype(np.int64) + self.offset[1]
+        size = self.radius * 2 + 1  # At least the cropped sprite's size
+        visible = (projectiles.alive[:n] & (left > -size) & (left < screen.get_width()) &
+                   (top > -size) & (top < screen.get_height()))
+        if not visible.any():
+            return []
+        sprites = self.sprites
+        return screen.blits([(sprites[owner], (x, y)) for owner, x, y in
+                             zip(projectiles.owner[:n][visible].tolist(),
+                                 left[visible].tolist(), top[visible].tolist())])
@@ -0,0 +1,219 @@
+import concurrent.futures
+import math
+import os
+import random
+from collections import OrderedDict
+import numpy as np
+import config
+import maps
+
+PLACEHOLDER_COLOR = (60, 60, 60)  # Shown until a chunk has been generated
+
+# Streamed chunks are requested this many chunks beyond the viewport, and
+# dropped from memory once they are further than EVICT_MARGIN away
+PREFETCH_MARGIN = 1
+EVICT_MARGIN = 3
+INSTALLS_PER_STREAM = 2  # Spread the terrain re-bakes of arriving chunks over frames
+
+workers = None
+
+def get_workers():
+    """Shared process pool for chunk generation, started on first use"""
+    global workers
+    if workers is None:
+        workers = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    return workers
+
+# Neighbouring chunks, edges first, then the diagonals that only share a corner
+NEIGHBOURS = {
+    'left': (-1, 0), 'right': (1, 0), 'top': (0, -1), 'bottom': (0, 1),
+    'top_left': (-1, -1), 'top_right': (1, -1), 'bottom_left': (-1, 1), 'bottom_right': (1, 1),
+}
+SEAM_ATTEMPTS = 4  # Solves tried per chunk before keeping one that breaks a seam
+
+def generate_chunk(seed, chunk_x, chunk_y, chunk_tiles, edges, backtracking):
+    """Worker entry point, returns the chunk as a (chunk_tiles, chunk_tiles) uint8 array.
+
+    The chunk is solved with a one-tile border. Border cells that touch an
+    existing neighbour are pre-collapsed to that neighbour's edge tiles, so
+    the new chunk joins up with it. The border corners hold the corner tiles
+    of diagonal neighbours. Solving the free border cells next to them
+    proves that any later chunk in between can join up with both.
+    """
+    tile_types = list(maps.TILE_TYPES.keys())
+    size = chunk_tiles + 2
+    fixed = {}
+    if 'left' in edges:
+        fixed.update(((0, y + 1), tile_types[t]) for y, t in enumerate(edges['left']))
+    if 'right' in edges:
+        fixed.update(((size - 1, y + 1), tile_types[t]) for y, t in enumerate(edges['right']))
+    if 'top' in edges:
+        fixed.update(((x + 1, 0), tile_types[t]) for x, t in enumerate(edges['top']))
+    if 'bottom' in edges:
+        fixed.update(((x + 1, size - 1), tile_types[t]) for x, t in enumerate(edges['bottom']))
+    corners = {'top_left': (0, 0), 'top_right': (size - 1, 0),
+               'bottom_left': (0, size - 1), 'bottom_right': (size - 1, size - 1)}
+    for name, cell in corners.items():
+        if name in edges:
+            fixed[cell] = tile_types[edges[name]]
+
+    # The permissive solver, or the backtracking one falling back to it, can
+    # still leave a rule broken next to the border, so retry with a new seed
+    best = None
+    for attempt in range(SEAM_ATTEMPTS):
+        chunk_seed = f"{seed}:{chunk_x}:{chunk_y}" + (f":{attempt}" if attempt else "")
+        wfc = maps.WaveFunctionCollapse(tile_types, maps.WFC_RULES, backtracking, seed=chunk_seed)
+        wfc.generate(size, size, fixed)
+        tile_ids = wfc.tile_ids()
+        broken = broken_borders(tile_ids, fixed, tile_types)
+        if best is None or broken < best[0]:
+            best = (broken, tile_ids)
+        if not broken:
+            break
+    broken, tile_ids = best
+    if broken:
+        print(f"Chunk {(chunk_x, chunk_y)} breaks {broken} tile rules along its seams")
+    return tile_ids[1:-1, 1:-1].copy()
+
+def broken_borders(tile_ids, fixed, tile_types):
+    """Count the rules broken between pre-collapsed border cells and the cells next to them"""
+    height, width = tile_ids.shape
+    broken = 0
+    for x, y in fixed:
+        rules = maps.WFC_RULES[tile_types[tile_ids[y, x]]]
+        for dx, dy in maps.DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and (nx, ny) not in fixed:
+                if tile_types[tile_ids[ny, nx]] not in rules[(dx, dy)]:
+                    broken += 1
+    return broken
+
+class PlaceholderTile(maps.Tile):
+    def __init__(self):
+        self.type = None
+        self.color = PLACEHOLDER_COLOR
+
+class StreamingTileMap:
+    """TileMap stand-in whose chunks are generated around the camera by worker processes.
+
+    Nothing here waits on a worker: tiles of missing chunks read as a
+    placeholder until the chunk arrives on a later stream() call.
+    """
+    def __init__(self, chunks_x, chunks_y, chunk_tiles, seed=None, backtracking=False):
+        self.chunk_tiles = chunk_tiles
+        self.chunks_x = chunks_x
+        self.chunks_y = chunks_y
+        self.width = chunks_x * chunk_tiles
+        self.height = chunks_y * chunk_tiles
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.backtracking = backtracking
+        self.tile_types = list(maps.TILE_TYPES.keys())
+        # Tiles are immutable, so every cell of a type shares one instance
+        self.tile_objects = [maps.Tile(tile_type) for tile_type in self.tile_types]
+        self.placeholder = PlaceholderTile()
+        self.chunks = OrderedDict()  # Resident chunks, least recently used first
+        self.evicted = {}  # Chunks far from the camera, packed as bytes
+        self.pending = {}
+        self.terrain = maps.TerrainRenderer(self)
+        self.wfc_stats = None
+
+    def get_tile(self, x, y):
+        chunk = self.chunks.get((x // self.chunk_tiles, y // self.chunk_tiles))
+        if chunk is None:
+            return self.placeholder
+        return self.tile_objects[chunk[y % self.chunk_tiles, x % self.chunk_tiles]]
+
+    def set_tile(self, x, y, tile_type):
+        chunk = self.chunks.get((x // self.chunk_tiles, y // self.chunk_tiles))
+        if chunk is not None:
+            chunk[y % self.chunk_tiles, x % self.chunk_tiles] = self.tile_types.index(tile_type)
+            self.terrain.invalidate_tile(x, y)
+
+    def chunk_ids(self, key):
+        """A generated chunk's tile ids, whether resident or evicted"""
+        if key in self.chunks:
+            return self.chunks[key]
+        if key in self.evicted:
+            return np.frombuffer(self.evicted[key], dtype=np.uint8).reshape(self.chunk_tiles, self.chunk_tiles)
+        return None
+
+    def install_chunk(self, key, tile_ids):
+        self.chunks[key] = tile_ids
+        # Re-bake the terrain chunks that showed placeholders for this one
+        start_x = key[0] * self.chunk_tiles
+        start_y = key[1] * self.chunk_tiles
+        for y in range(start_y, start_y + self.chunk_tiles, self.terrain.chunk_tiles):
+            for x in range(start_x, start_x + self.chunk_tiles, self.terrain.chunk_tiles):
+                self.terrain.invalidate_tile(x, y)
+
+    def neighbour_edges(self, chunk_x, chunk_y):
+        """The tiles of generated neighbours that touch chunk (chunk_x, chunk_y), for generate_chunk"""
+        edges = {}
+        for name, (dx, dy) in NEIGHBOURS.items():
+            ids = self.chunk_ids((chunk_x + dx, chunk_y + dy))
+            if ids is None:
+                continue
+            # The row or column of ids facing this chunk, or the single facing tile
+            row = -1 if dy < 0 else 0
+            column = -1 if dx < 0 else 0
+            if dx == 0:
+                edges[name] = ids[row, :].tolist()
+            elif dy == 0:
+                edges[name] = ids[:, column].tolist()
+            else:
+                edges[name] = int(ids[row, column])
+        return edges
+
+    def request_chunk(self, key):
+        chunk_x, chunk_y = key
+        # Wait for pending neighbours, diagonals included, so every shared
+        # edge and corner is constrained by one side
+        for dx, dy in NEIGHBOURS.values():
+            if (chunk_x + dx, chunk_y + dy) in self.pending:
+                return
+        self.pending[key] = get_workers().submit(generate_chunk, self.seed, chunk_x, chunk_y, self.chunk_tiles,
+                                                 self.neighbour_edges(chunk_x, chunk_y), self.backtracking)
+
+    def collect_finished(self):
+        installed = 0
+        for key, future in list(self.pending.items()):
+            if installed == INSTALLS_PER_STREAM:
+                break
+            if future.done():
+                del self.pending[key]
+                installed += 1
+                try:
+                    self.install_chunk(key, future.result())
+                except Exception as e:
+                    print(f"Chunk {key} failed to generate: {e}")
+
+    def stream(self, camera_pos):
+        """Install finished chunks, request the ones near the camera and evict distant ones"""
+        self.collect_finished()
+
+        chunk_pixels = self.chunk_tiles * config.TILE_SIZE
+        first_x = int(camera_pos[0]) // chunk_pixels
+        first_y = int(camera_pos[1]) // chunk_pixels
+        last_x = (int(camera_pos[0]) + config.WIDTH) // chunk_pixels
+        last_y = (int(camera_pos[1]) + config.HEIGHT) // chunk_pixels
+        center_x = (first_x + last_x) / 2
+        center_y = (first_y + last_y) / 2
+
+        # Nearest chunks first, so the viewport fills in from the middle
+        wanted = [(chunk_x, chunk_y)
+                  for chunk_y in range(max(0, first_y - PREFETCH_MARGIN), min(self.chunks_y, last_y + PREFETCH_MARGIN + 1))
+                  for chunk_x in range(max(0, first_x - PREFETCH_MARGIN), min(self.chunks_x, last_x + PREFETCH_MARGIN + 1))]
+        wanted.sort(key=lambda key: math.hypot(key[0] - center_x, key[1] - center_y))
+        for key in wanted:
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+            elif key in self.evicted:
+                self.install_chunk(key, self.chunk_ids(key).copy())
+                del self.evicted[key]
+            elif key not in self.pending:
+                self.request_chunk(key)
+
+        for key in list(self.chunks):
+            if (key[0] < first_x - EVICT_MARGIN or key[0] > last_x + EVICT_MARGIN or
+                key[1] < first_y - EVICT_MARGIN or key[1] > last_y + EVICT_MARGIN):
+                self.evicted[key] = self.chunks.pop(key).tobytes()